@@ -1,7 +1,103 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
 from tastypie.authentication import ApiKeyAuthentication
 
+
+class ApiKeyCache:
+    """Thread-safe LRU of validated ``(username, api key)`` pairs with a TTL
+
+    Only successful lookups are stored, keyed by a digest so raw keys are not
+    kept in memory. Entries are dropped by ``invalidate_user`` when a key is
+    rotated or deleted or the user changes; other processes only notice once
+    ``ttl`` seconds have passed.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    @staticmethod
+    def _key(username, api_key):
+        return username, hashlib.sha256(api_key.encode()).hexdigest()
+
+    def get(self, username, api_key):
+        """A copy of the cached user for these credentials, or None"""
+        key = self._key(username, api_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Requests may modify request.user, so never hand out the shared instance
+        return copy.copy(entry[0])
+
+    def set(self, username, api_key, user):
+        key = self._key(username, api_key)
+        with self._lock:
+            self._entries[key] = (copy.copy(user), time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in [key for key, (user, _) in self._entries.items() if user.pk == user_id]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+api_key_cache = ApiKeyCache(
+    maxsize=getattr(settings, 'API_KEY_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'API_KEY_CACHE_TTL', 60),
+)
+
+
 class CustomAuthentication(ApiKeyAuthentication):
     def is_authenticated(self, request, **kwargs):
         if request.method == 'GET':
             return True
-        return super().is_authenticated(request, **kwargs)
\ No newline at end of file
+
+        try:
+            username, api_key = self.extract_credentials(request)
+        except ValueError:
+            return self._unauthorized()
+        if username and api_key:
+            user = api_key_cache.get(username, api_key)
+            if user is not None:
+                request.user = user
+                return True
+
+        authenticated = super().is_authenticated(request, **kwargs)
+        if authenticated is True:
+            api_key_cache.set(username, api_key, request.user)
+        return authenticated
@@ -0,0 +1,54 @@
+from django.urls import re_path
+from tastypie.exceptions import BadRequest
+from tastypie.utils import trailing_slash
+
+from shop.bulk import read_csv, upsert_products
+
+
+class BulkUpsertMixin:
+    """Adds ``POST <resource>/bulk/`` for price and inventory feeds
+
+    The body is a JSON list of rows (or ``{"objects": [...]}``), or CSV with
+    a header line when sent as ``text/csv``. Rows are keyed by ``id`` or
+    ``sku``; see ``shop.bulk.upsert_products`` for the columns. The response
+    lists one result per row, in order.
+    """
+    bulk_chunk_size = 500
+
+    def prepend_urls(self):
+        return [
+            re_path(
+                r'^(?P<resource_name>%s)/bulk%s$' % (self._meta.resource_name, trailing_slash),
+                self.wrap_view('post_bulk'),
+                name='api_bulk_%s' % self._meta.resource_name,
+            ),
+        ] + super().prepend_urls()
+
+    def read_rows(self, request):
+        content_type = request.META.get('CONTENT_TYPE', '')
+        if content_type.startswith('text/csv'):
+            try:
+                return read_csv(request.body.decode('utf-8-sig'))
+            except UnicodeDecodeError:
+                raise BadRequest('CSV must be UTF-8.')
+        data = self.deserialize(request, request.body, format=content_type or 'application/json')
+        if isinstance(data, dict):
+            data = data.get('objects')
+        if not isinstance(data, list):
+            raise BadRequest('Expected a list of rows.')
+        return data
+
+    def post_bulk(self, request, **kwargs):
+        self.method_check(request, allowed=['post'])
+        self.is_authenticated(request)
+        self.throttle_check(request)
+        self.log_throttled_access(request)
+
+        results = upsert_products(self.read_rows(request), chunk_size=self.bulk_chunk_size)
+        counts = {'created': 0, 'updated': 0, 'error': 0}
+        for result in results:
+            counts[result['status']] += 1
+        return self.create_response(request, {
+            'meta': {'created': counts['created'], 'updated': counts['updated'], 'errors': counts['error']},
+            'objects': results,
+        })
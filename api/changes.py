@@ -0,0 +1,69 @@
+import datetime
+
+from django.urls import re_path
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from tastypie.exceptions import BadRequest
+from tastypie.utils import trailing_slash
+
+from shop.pagination import InvalidCursor
+from shop.sync import product_changes
+
+
+class ChangesFeedMixin:
+    """Adds ``<resource>/changes/``, the incremental sync feed for products
+
+    Takes ``cursor`` (from the previous response) or an ISO ``since``
+    timestamp, plus ``limit``. Returns changed products in ``objects``, ids
+    of deleted products in ``deleted`` and the cursor for the next call in
+    ``meta``; keep fetching while ``meta.has_more`` is true.
+    """
+    changes_limit = 100
+    changes_max_limit = 1000
+
+    def prepend_urls(self):
+        return [
+            re_path(
+                r'^(?P<resource_name>%s)/changes%s$' % (self._meta.resource_name, trailing_slash),
+                self.wrap_view('get_changes'),
+                name='api_changes_%s' % self._meta.resource_name,
+            ),
+        ] + super().prepend_urls()
+
+    def get_changes(self, request, **kwargs):
+        self.method_check(request, allowed=['get'])
+        self.is_authenticated(request)
+        self.throttle_check(request)
+        self.log_throttled_access(request)
+
+        since = request.GET.get('since')
+        if since:
+            try:
+                since = parse_datetime(since)
+            except ValueError:
+                since = None
+            if since is None:
+                raise BadRequest('Invalid since timestamp.')
+            if timezone.is_naive(since):
+                # Timestamps without an offset are taken as UTC
+                since = timezone.make_aware(since, datetime.timezone.utc)
+        try:
+            limit = min(int(request.GET.get('limit', self.changes_limit)), self.changes_max_limit)
+        except ValueError:
+            raise BadRequest('Invalid limit.')
+        if limit < 1:
+            raise BadRequest('Invalid limit.')
+
+        try:
+            changes = product_changes(cursor=request.GET.get('cursor'), since=since, limit=limit)
+        except InvalidCursor as e:
+            raise BadRequest(str(e))
+
+        return self.create_response(request, {
+            'meta': {'cursor': changes.cursor, 'has_more': changes.has_more, 'limit': limit},
+            'objects': [
+                self.full_dehydrate(self.build_bundle(obj=obj, request=request), for_list=True)
+                for obj in changes.products
+            ],
+            'deleted': changes.deleted,
+        })
@@ -0,0 +1,54 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """ETag and Last-Modified validators for GET list and detail responses
+
+    Validators come from one aggregate over the rows the response would
+    contain: the newest ``updated_at`` of each field in
+    ``validator_fields`` plus the row count, which catches deletions. A
+    matching ``If-None-Match`` or ``If-Modified-Since`` gets a 304 before
+    anything is fetched or serialized.
+    """
+    validator_fields = ('updated_at',)
+
+    def get_validators(self, request, objects):
+        """``(etag, last_modified)`` for ``objects`` as rendered for ``request``"""
+        aggregates = {f'max_{i}': Max(field) for i, field in enumerate(self.validator_fields)}
+        state = objects.order_by().aggregate(count=Count('pk'), **aggregates)
+        timestamps = [state[key] for key in aggregates if state[key] is not None]
+        last_modified = int(max(timestamps).timestamp()) if timestamps else None
+
+        key = '|'.join([
+            request.get_full_path(),
+            self.determine_format(request),
+            str(state['count']),
+            *(str(timestamp.timestamp()) for timestamp in timestamps),
+        ])
+        return quote_etag(hashlib.md5(key.encode()).hexdigest()), last_modified
+
+    def conditional_response(self, request, objects, view, **kwargs):
+        etag, last_modified = self.get_validators(request, objects)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = view(request, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # Clients may keep the payload but must revalidate before using it
+            patch_cache_control(response, no_cache=True)
+        return response
+
+    def get_list(self, request, **kwargs):
+        base_bundle = self.build_bundle(request=request)
+        objects = self.obj_get_list(bundle=base_bundle, **self.remove_api_resource_names(kwargs))
+        return self.conditional_response(request, objects, super().get_list, **kwargs)
+
+    def get_detail(self, request, **kwargs):
+        objects = self.get_object_list(request).filter(**self.remove_api_resource_names(kwargs))
+        return self.conditional_response(request, objects, super().get_detail, **kwargs)
@@ -0,0 +1,45 @@
+from django.http import StreamingHttpResponse
+from django.urls import re_path
+from tastypie.utils import trailing_slash
+
+from .serializers import dumps
+
+
+class NDJSONExportMixin:
+    """Adds ``<resource>/export/``, streaming every matching object as NDJSON
+
+    The list filters and ``order_by`` apply as usual, but there is no
+    pagination: the queryset is read in chunks of ``export_chunk_size`` and
+    each object is written as one JSON line, so memory stays flat however
+    large the export is.
+    """
+    export_chunk_size = 500
+
+    def prepend_urls(self):
+        return [
+            re_path(
+                r'^(?P<resource_name>%s)/export%s$' % (self._meta.resource_name, trailing_slash),
+                self.wrap_view('export_list'),
+                name='api_export_%s' % self._meta.resource_name,
+            ),
+        ] + super().prepend_urls()
+
+    def export_lines(self, request, objects):
+        serializer = self._meta.serializer
+        for obj in objects.iterator(chunk_size=self.export_chunk_size):
+            bundle = self.full_dehydrate(self.build_bundle(obj=obj, request=request), for_list=True)
+            yield dumps(serializer.to_simple(bundle, {})) + '\n'
+
+    def export_list(self, request, **kwargs):
+        self.method_check(request, allowed=['get'])
+        self.is_authenticated(request)
+        self.throttle_check(request)
+        self.log_throttled_access(request)
+
+        base_bundle = self.build_bundle(request=request)
+        objects = self.obj_get_list(bundle=base_bundle, **self.remove_api_resource_names(kwargs))
+        objects = self.apply_sorting(objects, options=request.GET)
+
+        response = StreamingHttpResponse(self.export_lines(request, objects), content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="%s.ndjson"' % self._meta.resource_name
+        return response
@@ -0,0 +1,62 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from tastypie.serializers import Serializer
+
+from api.models import OrderResource, ProductResource
+from api.serializers import FastJSONSerializer
+
+
+def _measure(render, repeat):
+    """Best wall time and peak traced memory of ``render()``, which returns a byte count"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = render()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    render()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, size
+
+
+class Command(BaseCommand):
+    help = 'Compares the default serializer, the fast serializer and the NDJSON export on the current data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def list_view(self, resource_class, serializer):
+        resource = resource_class()
+        resource._meta.serializer = serializer
+        request = RequestFactory().get('/', {'format': 'json', 'limit': 0})
+
+        def render():
+            return len(resource.wrap_view('dispatch_list')(request).content)
+        return render
+
+    def export_view(self, resource_class):
+        resource = resource_class()
+        request = RequestFactory().get('/')
+
+        def render():
+            return sum(len(chunk) for chunk in resource.wrap_view('export_list')(request).streaming_content)
+        return render
+
+    def handle(self, *args, **options):
+        for resource_class in (ProductResource, OrderResource):
+            name = resource_class._meta.resource_name
+            for label, render in (
+                ('default serializer', self.list_view(resource_class, Serializer())),
+                ('fast serializer', self.list_view(resource_class, FastJSONSerializer())),
+                ('ndjson export', self.export_view(resource_class)),
+            ):
+                seconds, peak, size = _measure(render, options['repeat'])
+                self.stdout.write(
+                    f'{name:<10} {label:<20} {seconds * 1000:8.1f} ms  '
+                    f'{peak / 1024:8.0f} KiB peak  {size / 1024:8.0f} KiB out'
+                )
@@ -0,0 +1,44 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from tastypie.authentication import ApiKeyAuthentication
+from tastypie.models import ApiKey
+
+from api.authentication import CustomAuthentication, api_key_cache
+
+
+class Command(BaseCommand):
+    help = 'Measures API key authentication overhead with and without the key cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def run(self, authentication, request, count):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for _ in range(count):
+                assert authentication.is_authenticated(request) is True
+            elapsed = time.perf_counter() - started
+        return elapsed / count * 1e6, len(queries) / count
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        # The benchmark user and key are rolled back afterwards
+        with transaction.atomic():
+            user = User.objects.create(username='benchmark-auth-user')
+            key = ApiKey.objects.create(user=user).key
+            request = RequestFactory().post('/', HTTP_AUTHORIZATION=f'ApiKey {user.username}:{key}')
+            api_key_cache.clear()
+
+            for label, authentication in (
+                ('uncached', ApiKeyAuthentication()),
+                ('cached', CustomAuthentication()),
+            ):
+                micros, queries = self.run(authentication, request, count)
+                self.stdout.write(f'{label:<10} {micros:8.1f} us/request  {queries:5.2f} queries/request')
+            self.stdout.write(f'cache: {api_key_cache.stats()}')
+            transaction.set_rollback(True)
@@ -1,26 +1,42 @@
+from django.db.models import Prefetch
 from tastypie.resources import ModelResource
 from shop.models import Category, Product, Cart, CartItem, Order, OrderItem
+from shop import catalog
+from shop.search import search_products
 from tastypie.authorization import Authorization
 from tastypie.authentication import Authentication
 from .authentication import CustomAuthentication
+from .bulk import BulkUpsertMixin
+from .changes import ChangesFeedMixin
+from .conditional import ConditionalGetMixin
+from .export import NDJSONExportMixin
+from .paginators import CursorPaginator
+from .serializers import FastJSONSerializer
 from tastypie import fields
 
 
-class CategoryResource(ModelResource):
+class CategoryResource(ConditionalGetMixin, ModelResource):
     class Meta:
         queryset = Category.objects.all()
         resource_name = 'categories'
+        serializer = FastJSONSerializer()
         allowed_methods = ['get']
 
 
-class ProductResource(ModelResource):
+class ProductResource(ConditionalGetMixin, BulkUpsertMixin, ChangesFeedMixin, NDJSONExportMixin, ModelResource):
     category = fields.ForeignKey('api.models.CategoryResource', 'category', full=True)
+    # The nested category is part of the payload
+    validator_fields = ('updated_at', 'category__updated_at')
     
     class Meta:
         queryset = Product.objects.filter(is_active=True)
         resource_name = 'products'
+        serializer = FastJSONSerializer()
         allowed_methods = ['get', 'post', 'put', 'delete']
-        excludes = ['created_at', 'updated_at']
+        excludes = [
+            'created_at', 'updated_at', 'effective_price', 'rating_sum', 'rating_count',
+            'rating_count_1', 'rating_count_2', 'rating_count_3', 'rating_count_4', 'rating_count_5',
+        ]
         authentication = CustomAuthentication()
         authorization = Authorization()
         filtering = {
@@ -30,6 +46,35 @@ class ProductResource(ModelResource):
             'title': ['icontains'],
         }
         ordering = ['title', 'price', 'created_at']
+        paginator_class = CursorPaginator
+
+    def get_object_list(self, request):
+        return catalog.with_listing_data(super().get_object_list(request))
+
+    def build_filters(self, filters=None, ignore_bad_filters=False):
+        orm_filters = super().build_filters(filters, ignore_bad_filters)
+        # Title lookups are served by the search index instead of a LIKE scan
+        if 'title__icontains' in orm_filters:
+            orm_filters['search'] = orm_filters.pop('title__icontains')
+        # Price filters apply to the discounted price customers actually pay
+        for key in [key for key in orm_filters if key.startswith('price__')]:
+            orm_filters['effective_' + key] = orm_filters.pop(key)
+        return orm_filters
+
+    def apply_sorting(self, obj_list, options=None):
+        obj_list = super().apply_sorting(obj_list, options)
+        ordering = [
+            field.replace('price', 'effective_price') if field.lstrip('-') == 'price' else field
+            for field in obj_list.query.order_by
+        ]
+        return obj_list.order_by(*ordering)
+
+    def apply_filters(self, request, applicable_filters):
+        query = applicable_filters.pop('search', None)
+        objects = super().apply_filters(request, applicable_filters)
+        if query:
+            objects = search_products(objects, query, fields=('title',)).order_by('search_rank')
+        return objects
 
     def hydrate(self, bundle): 
         if 'category_id' in bundle.data:
@@ -37,11 +82,14 @@ class ProductResource(ModelResource):
         return bundle
 
     def dehydrate(self, bundle):
-        bundle.data['category_id'] = bundle.obj.category.id
+        bundle.data['category_id'] = bundle.obj.category_id
         bundle.data['category_name'] = bundle.obj.category.title
         bundle.data['in_stock'] = bundle.obj.in_stock
         bundle.data['is_on_sale'] = bundle.obj.is_on_sale
-        bundle.data['current_price'] = float(bundle.obj.get_price)
+        bundle.data['current_price'] = float(bundle.obj.effective_price)
+        bundle.data['average_rating'] = bundle.obj.average_rating
+        bundle.data['review_count'] = bundle.obj.rating_count
+        bundle.data['rating_histogram'] = bundle.obj.rating_histogram
         return bundle
 
 
@@ -49,8 +97,12 @@ class CartResource(ModelResource):
     items = fields.ToManyField('api.models.CartItemResource', 'items', full=True)
     
     class Meta:
-        queryset = Cart.objects.all()
+        # Matches the full=True graph: items -> product -> category
+        queryset = Cart.objects.prefetch_related(
+            Prefetch('items', queryset=CartItem.objects.select_related('product__category')),
+        )
         resource_name = 'cart'
+        serializer = FastJSONSerializer()
         allowed_methods = ['get', 'post', 'put', 'delete']
         authentication = CustomAuthentication()
         authorization = Authorization()
@@ -66,8 +118,9 @@ class CartItemResource(ModelResource):
     cart = fields.ForeignKey(CartResource, 'cart')
     
     class Meta:
-        queryset = CartItem.objects.all()
+        queryset = CartItem.objects.select_related('product__category', 'cart')
         resource_name = 'cart-items'
+        serializer = FastJSONSerializer()
         allowed_methods = ['get', 'post', 'put', 'delete']
         authentication = CustomAuthentication()
         authorization = Authorization()
@@ -77,12 +130,15 @@ class CartItemResource(ModelResource):
         return bundle
 
 
-class OrderResource(ModelResource):
+class OrderResource(NDJSONExportMixin, ModelResource):
     items = fields.ToManyField('api.models.OrderItemResource', 'items', full=True)
     
     class Meta:
-        queryset = Order.objects.all()
+        queryset = Order.objects.prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('product__category')),
+        )
         resource_name = 'orders'
+        serializer = FastJSONSerializer()
         allowed_methods = ['get', 'post']
         excludes = ['created_at', 'updated_at']
         authentication = CustomAuthentication()
@@ -92,6 +148,7 @@ class OrderResource(ModelResource):
             'user': ['exact'],
         }
         ordering = ['-created_at']
+        paginator_class = CursorPaginator
 
 
 class OrderItemResource(ModelResource):
@@ -99,8 +156,9 @@ class OrderItemResource(ModelResource):
     order = fields.ForeignKey(OrderResource, 'order')
     
     class Meta:
-        queryset = OrderItem.objects.all()
+        queryset = OrderItem.objects.select_related('product__category', 'order')
         resource_name = 'order-items'
+        serializer = FastJSONSerializer()
         allowed_methods = ['get']
         authentication = CustomAuthentication()
         authorization = Authorization()
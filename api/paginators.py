@@ -0,0 +1,54 @@
+from tastypie.exceptions import BadRequest
+from tastypie.paginator import Paginator
+
+from shop.pagination import InvalidCursor, KeysetPaginator
+
+
+class CursorPaginator(Paginator):
+    """Keyset pagination for list endpoints
+
+    Clients follow the opaque ``meta.next``/``meta.previous`` links, so deep
+    pages cost the same as the first one and no ``COUNT(*)`` is run. Pass
+    ``count=1`` for a capped ``estimated_count``. Requests that send an
+    explicit ``offset`` keep tastypie's classic offset paging.
+    """
+
+    def page(self):
+        if 'offset' in self.request_data or not hasattr(self.objects, 'query'):
+            return super().page()
+
+        limit = self.get_limit()
+        if not limit:
+            return {
+                self.collection_name: self.objects,
+                'meta': {'limit': 0, 'next': None, 'previous': None},
+            }
+
+        paginator = KeysetPaginator(self.objects, limit)
+        try:
+            page = paginator.page(self.request_data.get('cursor'))
+        except InvalidCursor as e:
+            raise BadRequest(str(e))
+
+        meta = {
+            'limit': limit,
+            'next': self._generate_cursor_uri(limit, page.next_cursor),
+            'previous': self._generate_cursor_uri(limit, page.previous_cursor),
+        }
+        if self.request_data.get('count'):
+            meta['estimated_count'] = page.estimated_count
+            meta['count_is_exact'] = page.count_is_exact
+        return {
+            self.collection_name: page.object_list,
+            'meta': meta,
+        }
+
+    def _generate_cursor_uri(self, limit, cursor):
+        if cursor is None or self.resource_uri is None:
+            return None
+        request_params = self.request_data.copy()
+        for key in ('limit', 'offset', 'cursor'):
+            if key in request_params:
+                del request_params[key]
+        request_params.update({'limit': str(limit), 'cursor': cursor})
+        return '%s?%s' % (self.resource_uri, request_params.urlencode())
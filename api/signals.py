@@ -0,0 +1,20 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from tastypie.models import ApiKey
+
+from .authentication import api_key_cache
+
+
+@receiver(post_save, sender=ApiKey)
+@receiver(post_delete, sender=ApiKey)
+def invalidate_api_key(sender, instance, **kwargs):
+    """Forget cached credentials when a key is rotated or deleted"""
+    api_key_cache.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_api_user(sender, instance, **kwargs):
+    """Renames and deactivations must take effect on the next request"""
+    api_key_cache.invalidate_user(instance.pk)
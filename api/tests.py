@@ -1,3 +1,304 @@
-from django.test import TestCase
+import json
+import warnings
+from datetime import datetime
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.test import RequestFactory, TestCase, override_settings
+from tastypie.models import ApiKey
+from tastypie.serializers import Serializer
+
+from shop.models import Cart, CartItem, Category, Order, OrderItem, Product
+
+from .authentication import ApiKeyCache, CustomAuthentication, api_key_cache
+from .serializers import FastJSONSerializer
+
+
+class ProductResourceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(title='Books')
+        for title, discount in (('The Great Novel', None), ('Cookbook Master', 5), ('Novelty Mug', None)):
+            Product.objects.create(
+                title=title, description='', price=10, discount_price=discount, stock_quantity=1,
+                image='products/test.png', category=category,
+            )
+
+    def get_titles(self, **params):
+        response = self.client.get('/api/v1/products/', {'format': 'json', **params})
+        self.assertEqual(response.status_code, 200)
+        return [obj['title'] for obj in response.json()['objects']]
+
+    def test_title_filter_uses_search_index(self):
+        titles = self.get_titles(title__icontains='novel')
+        self.assertEqual(sorted(titles), ['Novelty Mug', 'The Great Novel'])
+
+    def test_price_filters_and_sorting_use_effective_price(self):
+        self.assertEqual(self.get_titles(price__lt=8), ['Cookbook Master'])
+        self.assertEqual(self.get_titles(order_by='price')[0], 'Cookbook Master')
+
+    def test_cursor_pagination(self):
+        response = self.client.get('/api/v1/products/', {'format': 'json', 'limit': 2, 'order_by': 'title'})
+        data = response.json()
+        self.assertNotIn('total_count', data['meta'])
+        titles = [obj['title'] for obj in data['objects']]
+        response = self.client.get(data['meta']['next'])
+        titles += [obj['title'] for obj in response.json()['objects']]
+        self.assertEqual(titles, ['Cookbook Master', 'Novelty Mug', 'The Great Novel'])
+        self.assertIsNone(response.json()['meta']['next'])
+
+
+class QueryCountTests(TestCase):
+    """Nested full=True resources load in a fixed number of queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='buyer')
+        categories = [Category.objects.create(title=f'Category {i}') for i in range(3)]
+        products = [
+            Product.objects.create(
+                title=f'Product {i}', description='', price=10, stock_quantity=5,
+                image='products/test.png', category=categories[i % 3],
+            )
+            for i in range(6)
+        ]
+        for i in range(4):
+            cart = Cart.objects.create(user=user if i == 0 else None)
+            order = Order.objects.create(
+                user=user, total_amount=30, shipping_address='Kyiv', billing_address='Kyiv',
+                phone='123', email='a@example.com',
+            )
+            for product in products[i:i + 3]:
+                CartItem.objects.create(cart=cart, product=product)
+                OrderItem.objects.create(order=order, product=product, quantity=1, price=10)
+        cls.product = products[0]
+
+    def assertEndpointQueries(self, num, url):
+        with self.assertNumQueries(num):
+            response = self.client.get(url, {'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_endpoints(self):
+        # Products and categories add one aggregate for their ETag
+        for url, num in (
+            ('/api/v1/categories/', 3),
+            ('/api/v1/products/', 2),
+            ('/api/v1/cart/', 3),
+            ('/api/v1/cart-items/', 2),
+            ('/api/v1/orders/', 2),
+            ('/api/v1/order-items/', 2),
+        ):
+            with self.subTest(url=url):
+                self.assertEndpointQueries(num, url)
+
+    def test_detail_endpoints(self):
+        self.assertEndpointQueries(2, f'/api/v1/products/{self.product.pk}/')
+        self.assertEndpointQueries(2, f'/api/v1/orders/{Order.objects.first().pk}/')
+        self.assertEndpointQueries(2, f'/api/v1/cart/{Cart.objects.first().pk}/')
+
+
+class SerializationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(title='Книги')
+        for i in range(5):
+            Product.objects.create(
+                title=f'Book {i}', description='', price=10 + i, stock_quantity=1,
+                image='products/test.png', category=category,
+            )
+
+    def test_fast_serializer_matches_default(self):
+        data = {'price': Decimal('9.50'), 'title': 'Книга', 'histogram': {5: 1, 4: 0}, 'created': datetime(2024, 1, 2)}
+        fast, default = FastJSONSerializer(), Serializer()
+        self.assertEqual(json.loads(fast.to_json(data)), json.loads(default.to_json(data)))
+        self.assertEqual(fast.from_json('{"a": [1]}'), {'a': [1]})
+
+    def test_export_streams_ndjson(self):
+        response = self.client.get('/api/v1/products/export/', {'price__gte': 12, 'order_by': 'price'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        objects = [json.loads(line) for line in lines]
+        self.assertEqual([obj['title'] for obj in objects], ['Book 2', 'Book 3', 'Book 4'])
+        self.assertEqual(objects[0]['category']['title'], 'Книги')
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(title='Books')
+        cls.product = Product.objects.create(
+            title='Novel', description='', price=10, stock_quantity=3,
+            image='products/test.png', category=cls.category,
+        )
+
+    def get(self, url, **headers):
+        return self.client.get(url, {'format': 'json'}, headers=headers)
+
+    def test_unchanged_list_returns_304_without_serializing(self):
+        response = self.get('/api/v1/products/')
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(1):
+            response = self.get('/api/v1/products/', if_none_match=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_bulk_update_changes_validators(self):
+        etag = self.get(f'/api/v1/products/{self.product.pk}/')['ETag']
+        Product.objects.filter(pk=self.product.pk).update(stock_quantity=F('stock_quantity') - 1)
+        response = self.get(f'/api/v1/products/{self.product.pk}/', if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['stock_quantity'], 2)
+
+    def test_category_rename_changes_product_and_category_validators(self):
+        products, categories = self.get('/api/v1/products/'), self.get('/api/v1/categories/')
+        self.category.title = 'Novels'
+        self.category.save()
+        self.assertEqual(self.get('/api/v1/products/', if_none_match=products['ETag']).status_code, 200)
+        self.assertEqual(self.get('/api/v1/categories/', if_none_match=categories['ETag']).status_code, 200)
+
+    def test_if_modified_since(self):
+        response = self.get('/api/v1/categories/')
+        self.assertIn('no-cache', response['Cache-Control'])
+        response = self.get('/api/v1/categories/', if_modified_since=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(SHOP_SYNC_SETTLE_SECONDS=0)
+class ChangesFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(title='Books')
+        cls.products = [
+            Product.objects.create(
+                title=f'Book {i}', description='', price=10, stock_quantity=1,
+                image='products/test.png', category=category,
+            )
+            for i in range(3)
+        ]
+
+    def get_changes(self, **params):
+        response = self.client.get('/api/v1/products/changes/', {'format': 'json', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_feed_pages_then_reports_only_changes(self):
+        first = self.get_changes(limit=2)
+        self.assertEqual([obj['title'] for obj in first['objects']], ['Book 0', 'Book 1'])
+        self.assertTrue(first['meta']['has_more'])
+        second = self.get_changes(limit=2, cursor=first['meta']['cursor'])
+        self.assertEqual([obj['title'] for obj in second['objects']], ['Book 2'])
+        self.assertFalse(second['meta']['has_more'])
+
+        book0, book1, book2 = self.products
+        deleted_id = book2.pk
+        book1.is_active = False
+        book1.save()
+        Product.objects.filter(pk=book0.pk).update(stock_quantity=0)
+        book2.delete()
+
+        changes = self.get_changes(cursor=second['meta']['cursor'])
+        self.assertEqual(
+            [(obj['title'], obj['is_active'], obj['stock_quantity']) for obj in changes['objects']],
+            [('Book 1', False, 1), ('Book 0', True, 0)],
+        )
+        self.assertEqual(changes['deleted'], [deleted_id])
+        self.assertEqual(self.get_changes(cursor=changes['meta']['cursor'])['objects'], [])
+
+    def test_since_timestamp(self):
+        Product.objects.filter(pk=self.products[1].pk).update(title='Book 1b')
+        since = Product.objects.get(pk=self.products[1].pk).updated_at
+        changes = self.get_changes(since=since.isoformat())
+        self.assertEqual([obj['title'] for obj in changes['objects']], ['Book 1b'])
+
+    @override_settings(TIME_ZONE='Europe/Kyiv')
+    def test_naive_since_is_utc(self):
+        Product.objects.filter(pk=self.products[1].pk).update(title='Book 1b')
+        since = Product.objects.get(pk=self.products[1].pk).updated_at
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            changes = self.get_changes(since=since.replace(tzinfo=None).isoformat())
+        self.assertEqual([obj['title'] for obj in changes['objects']], ['Book 1b'])
+
+        for since in ('yesterday', '2026-13-01T00:00:00'):
+            response = self.client.get('/api/v1/products/changes/', {'format': 'json', 'since': since})
+            self.assertEqual(response.status_code, 400)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/v1/products/changes/', {'format': 'json', 'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ApiKeyCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='partner')
+        cls.api_key = ApiKey.objects.create(user=cls.user)
+
+    def setUp(self):
+        api_key_cache.clear()
+
+    def authenticate(self, key=None):
+        request = RequestFactory().post('/', HTTP_AUTHORIZATION=f'ApiKey partner:{key or self.api_key.key}')
+        return CustomAuthentication().is_authenticated(request) is True, request
+
+    def test_validated_key_is_served_from_cache(self):
+        self.assertTrue(self.authenticate()[0])
+        with self.assertNumQueries(0):
+            authenticated, request = self.authenticate()
+        self.assertTrue(authenticated)
+        self.assertEqual(request.user, self.user)
+        self.assertEqual((api_key_cache.stats()['hits'], api_key_cache.stats()['misses']), (1, 1))
+
+    def test_rotation_and_deactivation_invalidate(self):
+        old_key = self.api_key.key
+        self.assertTrue(self.authenticate()[0])
+        self.api_key.key = ''
+        self.api_key.save()
+        self.assertFalse(self.authenticate(old_key)[0])
+        self.assertTrue(self.authenticate()[0])
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(self.authenticate()[0])
+
+    def test_lru_eviction_and_ttl(self):
+        cache = ApiKeyCache(maxsize=2, ttl=60)
+        for name in ('a', 'b', 'c'):
+            cache.set(name, 'key', self.user)
+        self.assertIsNone(cache.get('a', 'key'))
+        self.assertIsNotNone(cache.get('c', 'key'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        cache.ttl = -1
+        cache.set('d', 'key', self.user)
+        self.assertIsNone(cache.get('d', 'key'))
+
+
+class BulkUpsertEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(title='Books')
+        cls.product = Product.objects.create(
+            title='Novel', sku='NOV-1', description='', price=10, stock_quantity=5,
+            image='products/test.png', category=cls.category,
+        )
+        cls.api_key = ApiKey.objects.create(user=User.objects.create(username='erp'))
+
+    def post(self, body, content_type, **headers):
+        return self.client.post('/api/v1/products/bulk/', body, content_type=content_type, headers=headers)
+
+    def test_csv_feed(self):
+        body = f'sku,price,stock_delta,title,category\nNOV-1,12.50,-2,,\nNEW-1,3,,New,{self.category.pk}\n'
+        response = self.post(body, 'text/csv', authorization=f'ApiKey erp:{self.api_key.key}')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['meta'], {'created': 1, 'updated': 1, 'errors': 0})
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.price, self.product.stock_quantity), (Decimal('12.50'), 3))
+
+    def test_json_feed_requires_api_key(self):
+        rows = json.dumps([{'id': self.product.pk, 'stock_quantity': 1}])
+        self.assertEqual(self.post(rows, 'application/json').status_code, 401)
+        response = self.post(rows, 'application/json', authorization=f'ApiKey erp:{self.api_key.key}')
+        self.assertEqual(response.json()['objects'], [{'row': 0, 'status': 'updated', 'id': self.product.pk}])
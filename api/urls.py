@@ -7,9 +7,10 @@ from api.models import (
     OrderResource, 
     OrderItemResource
 )
+from api.serializers import FastJSONSerializer
 from django.urls import path, include
 
-api = Api(api_name='v1')
+api = Api(api_name='v1', serializer_class=FastJSONSerializer)
 api.register(CategoryResource())
 api.register(ProductResource())
 api.register(CartResource())
@@ -0,0 +1,83 @@
+"""Database profiles selected through environment variables
+
+``DB_PROFILE`` picks one of PROFILES. Without it, a ``DATABASE_URL`` selects
+``postgres``, a ``SQLITE_PATH`` the tuned ``sqlite-wal`` profile, and a bare
+checkout stays on ``sqlite-default``: switching the tracked db.sqlite3 to WAL
+would rewrite its header on the first connection.
+"""
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILES = ('sqlite-default', 'sqlite-wal', 'postgres', 'postgres-pool')
+POSTGRES_SCHEMES = ('postgres', 'postgresql', 'pgsql')
+
+
+def _int(environ, name, default):
+    return int(environ.get(name, default))
+
+
+def sqlite_settings(environ, base_dir, tuned=True):
+    database = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': environ.get('SQLITE_PATH') or base_dir / 'db.sqlite3',
+        # A file-backed test database lets concurrency tests share it across threads
+        'TEST': {'NAME': base_dir / 'test_db.sqlite3'},
+        'OPTIONS': {
+            # Take the write lock at BEGIN, so a transaction that reads and then
+            # writes waits on busy_timeout instead of failing to upgrade its
+            # lock, and queue workers (shop.payments) never claim the same rows
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+    if tuned:
+        # WAL lets readers run alongside the single writer; NORMAL only
+        # syncs at checkpoints, which is still safe in WAL mode
+        database['OPTIONS']['init_command'] = ';'.join([
+            'PRAGMA journal_mode=WAL',
+            f"PRAGMA busy_timeout={_int(environ, 'SQLITE_BUSY_TIMEOUT', 5000)}",
+            f"PRAGMA synchronous={environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')}",
+            f"PRAGMA mmap_size={_int(environ, 'SQLITE_MMAP_SIZE', 256 * 1024 * 1024)}",
+        ])
+    return database
+
+
+def postgres_settings(environ, url, pooled=False):
+    parts = urlsplit(url)
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': unquote(parts.path.lstrip('/')),
+        'USER': unquote(parts.username or ''),
+        'PASSWORD': unquote(parts.password or ''),
+        'HOST': parts.hostname or '',
+        'PORT': str(parts.port or ''),
+        'OPTIONS': dict(parse_qsl(parts.query)),
+    }
+    if pooled:
+        # Pooled connections are returned to psycopg's pool after each request;
+        # Django requires CONN_MAX_AGE = 0 with a pool
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS']['pool'] = {
+            'min_size': _int(environ, 'DB_POOL_MIN_SIZE', 2),
+            'max_size': _int(environ, 'DB_POOL_MAX_SIZE', 10),
+            'timeout': _int(environ, 'DB_POOL_TIMEOUT', 10),
+        }
+    else:
+        database['CONN_MAX_AGE'] = _int(environ, 'DB_CONN_MAX_AGE', 600)
+        database['CONN_HEALTH_CHECKS'] = environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1'
+    return database
+
+
+def database_settings(environ, base_dir):
+    """``DATABASES['default']`` for the profile selected by ``environ``"""
+    url = environ.get('DATABASE_URL', '')
+    profile = environ.get('DB_PROFILE') or (
+        'postgres' if url else 'sqlite-wal' if environ.get('SQLITE_PATH') else 'sqlite-default'
+    )
+    if profile not in PROFILES:
+        raise ImproperlyConfigured(f'DB_PROFILE must be one of {", ".join(PROFILES)}, not {profile!r}.')
+    if profile.startswith('postgres'):
+        if urlsplit(url).scheme not in POSTGRES_SCHEMES:
+            raise ImproperlyConfigured(f'DB_PROFILE={profile} needs a postgres:// DATABASE_URL.')
+        return postgres_settings(environ, url, pooled=profile == 'postgres-pool')
+    return sqlite_settings(environ, base_dir, tuned=profile == 'sqlite-wal')
@@ -13,6 +13,8 @@ from dotenv import load_dotenv
 import os
 from pathlib import Path
 
+from base.database import database_settings
+
 load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / ' subdir'.
@@ -48,8 +50,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'shop.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'shop.media.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -71,6 +74,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'shop.context_processors.cart_summary',
             ],
         },
     },
@@ -82,13 +86,65 @@ WSGI_APPLICATION = 'base.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# DB_PROFILE: sqlite-default (default), sqlite-wal (default with SQLITE_PATH), or with
+# DATABASE_URL postgres (persistent connections) / postgres-pool; see base/database.py
 DATABASES = {
+    'default': database_settings(os.environ, BASE_DIR),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Page invalidation bumps version counters in the cache, so every gunicorn
+# worker has to see the same cache: a per-process LocMemCache would keep
+# serving stale pages from the other workers. Set CACHE_DIR to move it.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR') or BASE_DIR / '.cache',
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000))},
     }
 }
 
+SHOP_PAGE_CACHE_TIMEOUT = int(os.environ.get('SHOP_PAGE_CACHE_TIMEOUT', 600))
+
+# Guest carts untouched for this many days are deleted by reap_carts
+SHOP_GUEST_CART_TTL_DAYS = int(os.environ.get('SHOP_GUEST_CART_TTL_DAYS', 14))
+# Seconds between reaper runs inside one gunicorn worker (see gunicorn.conf.py);
+# 0 leaves it to the reap_carts command/cron
+SHOP_CART_REAPER_INTERVAL = int(os.environ.get('SHOP_CART_REAPER_INTERVAL', 0))
+# Seconds between payment event runs inside the same gunicorn worker as the reaper;
+# 0 leaves it to process_payments --loop (the Procfile's worker process)
+SHOP_PAYMENT_WORKER_INTERVAL = int(os.environ.get('SHOP_PAYMENT_WORKER_INTERVAL', 0))
+
+# Validated API keys are cached per process for this many seconds
+API_KEY_CACHE_TTL = int(os.environ.get('API_KEY_CACHE_TTL', 60))
+API_KEY_CACHE_SIZE = int(os.environ.get('API_KEY_CACHE_SIZE', 1024))
+
+# Share of requests that get SQL/template timing logged and a Server-Timing header
+SHOP_INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('SHOP_INSTRUMENTATION_SAMPLE_RATE', 0))
+# JSON lines for request_report; stderr when unset
+SHOP_INSTRUMENTATION_LOG = os.environ.get('SHOP_INSTRUMENTATION_LOG')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'instrumentation': (
+            {'class': 'logging.FileHandler', 'filename': SHOP_INSTRUMENTATION_LOG, 'formatter': 'message'}
+            if SHOP_INSTRUMENTATION_LOG else
+            {'class': 'logging.StreamHandler', 'formatter': 'message'}
+        ),
+    },
+    'loggers': {
+        'shop.instrumentation': {'handlers': ['instrumentation'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -130,6 +186,22 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# collectstatic writes content-hashed names plus .gz (and .br with Brotli installed)
+# copies; WhiteNoise serves the hashed names with immutable far-future headers
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+# Fall back to the unhashed name for files missing from the manifest instead of erroring
+WHITENOISE_MANIFEST_STRICT = False
+
+# Seconds browsers may reuse uploaded originals; thumbnails are immutable
+SHOP_MEDIA_MAX_AGE = int(os.environ.get('SHOP_MEDIA_MAX_AGE', 86400))
+# Hand media bodies to the front-end server: an nginx internal location such as
+# /protected-media/, or X-Sendfile for Apache/lighttpd
+SHOP_MEDIA_ACCEL_REDIRECT = os.environ.get('SHOP_MEDIA_ACCEL_REDIRECT', '')
+SHOP_MEDIA_SENDFILE = os.environ.get('SHOP_MEDIA_SENDFILE', '') == '1'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -0,0 +1,49 @@
+"""Gunicorn settings
+
+SERVER_MODE=asgi serves base.asgi with uvicorn workers, so async views run on
+an event loop and slow clients no longer hold a whole worker; the default is
+the classic WSGI app on sync workers. Workers come from WEB_CONCURRENCY and
+the port from PORT, both read by gunicorn itself.
+"""
+import os
+
+if os.environ.get('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'base.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'base.wsgi:application'
+
+
+def _lock_path(master_pid):
+    import tempfile
+    return os.path.join(tempfile.gettempdir(), f'shop-background-{master_pid}.lock')
+
+
+def post_worker_init(worker):
+    """Run the in-process background jobs in one worker at a time
+
+    The first worker to take the lock keeps it for its lifetime; the worker
+    that replaces it after a crash or restart takes it over. Management
+    commands never start these threads.
+    """
+    import fcntl
+
+    lock = open(_lock_path(worker.ppid), 'w')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return
+    worker.background_lock = lock
+
+    from shop.payments import start_worker
+    from shop.reaper import start_scheduler
+    start_scheduler()
+    start_worker()
+
+
+def on_exit(server):
+    try:
+        os.remove(_lock_path(server.pid))
+    except FileNotFoundError:
+        pass
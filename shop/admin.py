@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Category, Product, ProductImage, Cart, CartItem, Order, OrderItem, Review, Wishlist
+from .cache import bulk_invalidation
+from .models import Category, Product, ProductImage, Cart, CartItem, Order, OrderItem, PaymentEvent, Review, Wishlist
 
 admin.site.site_header = "Online Store Admin"
 admin.site.site_title = "Online Store"
@@ -25,6 +26,11 @@ class ProductAdmin(admin.ModelAdmin):
     inlines = [ProductImageInline]
     list_editable = ('price', 'stock_quantity', 'is_active', 'featured')
 
+    def changelist_view(self, request, extra_context=None):
+        # list_editable saves every row; invalidate the page cache once
+        with bulk_invalidation():
+            return super().changelist_view(request, extra_context)
+
 
 class CartItemInline(admin.TabularInline):
     model = CartItem
@@ -52,6 +58,19 @@ class OrderAdmin(admin.ModelAdmin):
     readonly_fields = ('user', 'order_number', 'total_amount', 'shipping_address', 'billing_address', 'phone', 'email', 'notes', 'created_at', 'updated_at')
 
 
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(admin.ModelAdmin):
+    list_display = ('transaction_id', 'status', 'order_ref', 'outcome', 'received_at', 'processed_at')
+    list_filter = ('provider', 'status', 'outcome')
+    search_fields = ('transaction_id', 'order_ref')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('product', 'user', 'rating', 'created_at')
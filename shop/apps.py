@@ -5,3 +5,5 @@ class ShopConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shop'
 
+    def ready(self):
+        import shop.signals
@@ -0,0 +1,271 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone as dt_timezone
+
+import django
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import OperationalError, connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Cart, CartItem, Category, Order, Product
+
+CHECKOUT_FORM = {
+    'shipping_address': 'Kyiv', 'billing_address': 'Kyiv', 'phone': '+380000000000', 'email': 'bench@example.com',
+}
+
+
+class Scenario:
+    """One request shape to measure
+
+    ``path`` is a callable taking a ``random.Random`` so every iteration can
+    hit a different product or page. ``setup`` runs before each iteration,
+    outside the timing. ``user`` picks an anonymous or logged-in client.
+    """
+
+    def __init__(self, name, path, method='get', data=None, user=False, setup=None, cold_cache=False):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.data = data
+        self.user = user
+        self.setup = setup
+        self.cold_cache = cold_cache
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = (len(ordered) - 1) * pct / 100
+    lower = int(index)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (index - lower)
+
+
+class BenchmarkSuite:
+    """Runs storefront and API scenarios against whatever catalog is in the database
+
+    Each scenario is timed over ``iterations`` requests through the test
+    client (the whole middleware stack, no network), then repeated once
+    under tracemalloc for peak memory. Everything runs in a transaction
+    that is rolled back, so write scenarios such as checkout leave no
+    trace.
+    """
+
+    def __init__(self, iterations=50, warmup=5, seed=1):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.rng = random.Random(seed)
+
+    def _fixtures(self):
+        product_ids = list(
+            Product.objects.filter(is_active=True, stock_quantity__gt=10).order_by('pk').values_list('pk', flat=True)[:500]
+        )
+        if not product_ids:
+            raise ValueError('No products in stock; run the seed command first.')
+        self.product_ids = product_ids
+        self.category_ids = list(Category.objects.order_by('pk').values_list('pk', flat=True))
+        self.user = (
+            User.objects.filter(pk__in=Order.objects.values('user')).order_by('pk').first()
+            or User.objects.create(username='benchmark-user')
+        )
+        self.cart = Cart.objects.filter(user=self.user).first() or Cart.objects.create(user=self.user)
+
+    def fill_cart(self):
+        CartItem.objects.filter(cart=self.cart).delete()
+        CartItem.objects.bulk_create(
+            CartItem(cart=self.cart, product_id=product_id, quantity=1)
+            for product_id in self.rng.sample(self.product_ids, min(3, len(self.product_ids)))
+        )
+
+    def scenarios(self):
+        index = reverse('shop:index')
+        word = Product.objects.filter(pk=self.product_ids[0]).values_list('title', flat=True).get().split()[0]
+        return [
+            Scenario('index', lambda rng: index, cold_cache=True),
+            Scenario('index_cached', lambda rng: index),
+            Scenario('index_search', lambda rng: f'{index}?search={word}', cold_cache=True),
+            Scenario('index_sort_price', lambda rng: f'{index}?sort=price_low', cold_cache=True),
+            Scenario('index_category', lambda rng: f'{index}?category={rng.choice(self.category_ids)}', cold_cache=True),
+            Scenario('index_logged_in', lambda rng: index, user=True),
+            Scenario('product_detail', lambda rng: reverse('shop:product_detail', args=[rng.choice(self.product_ids)]),
+                     cold_cache=True),
+            Scenario('cart_view', lambda rng: reverse('shop:cart'), user=True, setup=self.fill_cart),
+            Scenario('checkout_page', lambda rng: reverse('shop:checkout'), user=True, setup=self.fill_cart),
+            Scenario('checkout_submit', lambda rng: reverse('shop:checkout'), method='post', data=CHECKOUT_FORM,
+                     user=True, setup=self.fill_cart),
+            Scenario('order_history', lambda rng: reverse('shop:order_history'), user=True),
+            *[
+                Scenario(f'api_{name.replace("-", "_")}', lambda rng, name=name: f'/api/v1/{name}/?format=json')
+                for name in ('products', 'categories', 'cart', 'cart-items', 'orders', 'order-items')
+            ],
+        ]
+
+    def _request(self, client, scenario, rng):
+        if scenario.setup:
+            scenario.setup()
+        if scenario.cold_cache:
+            cache.clear()
+        path = scenario.path(rng)
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, scenario.method)(path, scenario.data)
+        return time.perf_counter() - started, len(queries), response.status_code
+
+    def measure(self, scenario):
+        client = Client(HTTP_HOST='localhost')
+        if scenario.user:
+            client.force_login(self.user)
+        rng = random.Random(scenario.name)
+        for _ in range(self.warmup):
+            self._request(client, scenario, rng)
+
+        timings, query_counts, statuses = [], [], set()
+        for _ in range(self.iterations):
+            elapsed, queries, status = self._request(client, scenario, rng)
+            timings.append(elapsed * 1000)
+            query_counts.append(queries)
+            statuses.add(status)
+
+        tracemalloc.start()
+        self._request(client, scenario, rng)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'name': scenario.name,
+            'method': scenario.method.upper(),
+            'statuses': sorted(statuses),
+            'iterations': self.iterations,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p90_ms': round(percentile(timings, 90), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'max_ms': round(max(timings), 3),
+            'queries_mean': round(statistics.fmean(query_counts), 2),
+            'queries_max': max(query_counts),
+            'peak_memory_kib': round(peak / 1024, 1),
+        }
+
+    def metadata(self):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'products': Product.objects.count(),
+            'orders': Order.objects.count(),
+            'iterations': self.iterations,
+        }
+
+    def run(self, only=None, log=None):
+        """Measure every scenario (or those named in ``only``) and return a JSON-ready report"""
+        log = log or (lambda result: None)
+        results = []
+        with transaction.atomic():
+            self._fixtures()
+            report = {'meta': self.metadata(), 'scenarios': results}
+            for scenario in self.scenarios():
+                if only and scenario.name not in only:
+                    continue
+                result = self.measure(scenario)
+                results.append(result)
+                log(result)
+            transaction.set_rollback(True)
+        cache.clear()
+        return report
+
+
+def compare(baseline, current, threshold=0.1):
+    """Rows of ``(name, metric, before, after, change)`` for metrics that moved by more than ``threshold``"""
+    before = {result['name']: result for result in baseline['scenarios']}
+    rows = []
+    for result in current['scenarios']:
+        old = before.get(result['name'])
+        if old is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'queries_mean', 'peak_memory_kib'):
+            if old[metric] and abs(result[metric] - old[metric]) / old[metric] > threshold:
+                rows.append((result['name'], metric, old[metric], result[metric], result[metric] / old[metric] - 1))
+    return rows
+
+
+WORKER_PREFIX = 'bench-worker-'
+
+
+def prepare_concurrency_fixtures(workers, products=200):
+    """Users and well-stocked products for ``cart_worker`` processes"""
+    category = Category.objects.create(title='Benchmark')
+    Product.objects.bulk_create(
+        Product(title=f'Benchmark product {i}', description='Benchmark', price=10 + i % 90,
+                stock_quantity=10 ** 9, image='products/benchmark.jpg', category=category)
+        for i in range(products)
+    )
+    User.objects.bulk_create(User(username=f'{WORKER_PREFIX}{i}') for i in range(workers))
+
+
+def cart_worker(worker, duration, checkout_every=5, seed=1):
+    """Add to cart, view the cart and check out in a loop for ``duration`` seconds
+
+    Meant to run as one of several processes, like gunicorn workers, against
+    the same database. Requests that fail on the database (``database is
+    locked`` on SQLite) are counted as errors rather than timed.
+    """
+    client = Client(HTTP_HOST='localhost')
+    client.force_login(User.objects.get(username=f'{WORKER_PREFIX}{worker}'))
+    product_ids = list(Product.objects.filter(title__startswith='Benchmark product').values_list('pk', flat=True))
+    rng = random.Random(seed * 1000 + worker)
+    latencies = {'add': [], 'cart': [], 'checkout': []}
+    errors = 0
+    deadline = time.perf_counter() + duration
+    step = 0
+    while time.perf_counter() < deadline:
+        step += 1
+        if step % checkout_every == 0:
+            kind, method, path, data = 'checkout', 'post', reverse('shop:checkout'), CHECKOUT_FORM
+        elif step % 2:
+            kind, method, path = 'add', 'post', reverse('shop:add_to_cart', args=[rng.choice(product_ids)])
+            data = {'quantity': 1}
+        else:
+            kind, method, path, data = 'cart', 'get', reverse('shop:cart'), None
+        started = time.perf_counter()
+        try:
+            getattr(client, method)(path, data)
+        except OperationalError:
+            errors += 1
+            continue
+        latencies[kind].append((time.perf_counter() - started) * 1000)
+    return {'worker': worker, 'errors': errors, 'latencies': latencies}
+
+
+def summarize_workers(profile, results, duration):
+    """Throughput and latency of one profile from its workers' results"""
+    row = {'profile': profile, 'workers': len(results), 'errors': sum(result['errors'] for result in results)}
+    operations = 0
+    for kind in ('add', 'cart', 'checkout'):
+        timings = [ms for result in results for ms in result['latencies'][kind]]
+        operations += len(timings)
+        row[f'{kind}_per_second'] = round(len(timings) / duration, 1)
+        row[f'{kind}_p50_ms'] = round(percentile(timings, 50), 2) if timings else None
+        row[f'{kind}_p95_ms'] = round(percentile(timings, 95), 2) if timings else None
+    row['requests_per_second'] = round(operations / duration, 1)
+    return row
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,204 @@
+import csv
+import io
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+
+from .cache import invalidate_products
+from .models import Category, Product
+from .search import get_backend
+
+# Columns a feed may set; stock goes through STOCK_FIELDS instead
+FIELDS = (
+    'sku', 'title', 'description', 'price', 'discount_price', 'category',
+    'is_active', 'featured', 'weight', 'dimensions', 'image',
+)
+STOCK_FIELDS = ('stock_quantity', 'stock_delta')
+REQUIRED_FOR_CREATE = ('title', 'price', 'category')
+BOOLEANS = {'true': True, 'yes': True, '1': True, 'false': False, 'no': False, '0': False}
+
+
+def read_csv(text):
+    """Rows of a CSV feed; empty cells mean "leave unchanged" and are dropped"""
+    return [
+        {key: value for key, value in row.items() if key and value not in ('', None)}
+        for row in csv.DictReader(io.StringIO(text))
+    ]
+
+
+def _clean_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f'{value!r} is not an integer.')
+
+
+def clean_row(row):
+    """Validate one feed row, returning ``(key, values, stock, errors)``
+
+    ``key`` is ``('id', pk)`` or ``('sku', sku)``, ``values`` maps model
+    attributes to cleaned values and ``stock`` is ``None``,
+    ``('set', n)`` or ``('add', n)``.
+    """
+    errors, values, stock, key = {}, {}, None, None
+
+    unknown = set(row) - {'id', *FIELDS, *STOCK_FIELDS}
+    for name in sorted(unknown):
+        errors[name] = 'Unknown field.'
+
+    for name in FIELDS:
+        if name not in row:
+            continue
+        value = row[name]
+        try:
+            if name == 'category':
+                values['category_id'] = _clean_int(value)
+                continue
+            if isinstance(value, str) and name in ('is_active', 'featured'):
+                if value.lower() not in BOOLEANS:
+                    raise ValidationError(f'{value!r} is not a boolean.')
+                value = BOOLEANS[value.lower()]
+            values[name] = Product._meta.get_field(name).clean(value, None)
+            if name == 'sku' and not values['sku']:
+                values['sku'] = None
+        except ValidationError as e:
+            errors[name] = ' '.join(e.messages)
+
+    if 'stock_quantity' in row and 'stock_delta' in row:
+        errors['stock_quantity'] = 'Send either stock_quantity or stock_delta, not both.'
+    else:
+        for name, mode in (('stock_quantity', 'set'), ('stock_delta', 'add')):
+            if name in row:
+                try:
+                    stock = (mode, _clean_int(row[name]))
+                except ValidationError as e:
+                    errors[name] = ' '.join(e.messages)
+                else:
+                    if mode == 'set' and stock[1] < 0:
+                        errors[name] = 'Stock cannot be negative.'
+
+    if 'id' in row:
+        try:
+            key = ('id', _clean_int(row['id']))
+        except ValidationError as e:
+            errors['id'] = ' '.join(e.messages)
+    elif values.get('sku'):
+        key = ('sku', values['sku'])
+    else:
+        errors['id'] = 'Each row needs an id or a sku.'
+    return key, values, stock, errors
+
+
+def _stock_update(stock):
+    """One UPDATE for a chunk's stock changes; deltas are applied with F() so they
+    add to whatever concurrent checkouts left rather than overwriting it, and
+    stop at 0"""
+    whens = [
+        When(pk=pk, then=Value(amount) if mode == 'set' else Greatest(F('stock_quantity') + amount, 0))
+        for pk, (mode, amount) in stock.items()
+    ]
+    Product.objects.filter(pk__in=list(stock)).update(
+        stock_quantity=Case(*whens, default=F('stock_quantity')),
+    )
+
+
+def _apply_chunk(chunk, results):
+    ids = [key[1] for _, key, _, _ in chunk if key[0] == 'id']
+    skus = [key[1] for _, key, _, _ in chunk if key[0] == 'sku']
+    updated, created, stock, update_fields, seen = [], [], {}, set(), set()
+
+    # Skus that rows keyed by id move their product to, to check who owns them
+    skus += [values['sku'] for _, key, values, _ in chunk if key[0] == 'id' and values.get('sku')]
+
+    with transaction.atomic():
+        by_id = Product.objects.in_bulk(ids)
+        by_sku = {product.sku: product for product in Product.objects.filter(sku__in=skus)}
+        category_ids = set(Category.objects.filter(
+            pk__in={values['category_id'] for _, _, values, _ in chunk if 'category_id' in values}
+        ).values_list('pk', flat=True))
+
+        for index, (kind, value), values, row_stock in chunk:
+            if 'category_id' in values and values['category_id'] not in category_ids:
+                results[index] = {'row': index, 'status': 'error', 'errors': {'category': 'Unknown category.'}}
+                continue
+            product = by_id.get(value) if kind == 'id' else by_sku.get(value)
+            if product is None:
+                if kind == 'id':
+                    results[index] = {'row': index, 'status': 'error', 'errors': {'id': 'Unknown product id.'}}
+                    continue
+                missing = [name for name in REQUIRED_FOR_CREATE if name not in values and f'{name}_id' not in values]
+                if missing:
+                    errors = {name: 'Required for new products.' for name in missing}
+                    results[index] = {'row': index, 'status': 'error', 'errors': errors}
+                    continue
+                product = Product(**values)
+                if row_stock:
+                    product.stock_quantity = max(row_stock[1], 0)
+                created.append((index, product))
+                continue
+            if product.pk in seen:
+                # The same product keyed once by id and once by sku
+                results[index] = {'row': index, 'status': 'error', 'errors': {kind: 'Duplicate row for this product.'}}
+                continue
+            owner = by_sku.get(values.get('sku'))
+            if owner is not None and owner.pk != product.pk:
+                results[index] = {'row': index, 'status': 'error', 'errors': {'sku': 'Another product has this sku.'}}
+                continue
+            seen.add(product.pk)
+            for name, new_value in values.items():
+                setattr(product, name, new_value)
+            update_fields.update(values)
+            updated.append((index, product))
+            if row_stock:
+                stock[product.pk] = row_stock
+
+        if update_fields:
+            Product.objects.bulk_update([product for _, product in updated], update_fields)
+        if created:
+            Product.objects.bulk_create([product for _, product in created])
+        if stock:
+            _stock_update(stock)
+
+        touched = [product for _, product in updated + created]
+        if touched:
+            get_backend().update_many(touched)
+            # Bulk writes bypass the model signals
+            invalidate_products(touched)
+
+    for status, pairs in (('updated', updated), ('created', created)):
+        for index, product in pairs:
+            results[index] = {'row': index, 'status': status, 'id': product.pk}
+
+
+def upsert_products(rows, chunk_size=500):
+    """Create or update products from feed rows keyed by ``id`` or ``sku``
+
+    Every row is validated first. Valid rows are applied ``chunk_size`` at a
+    time, each chunk in its own transaction, with one ``bulk_update``, one
+    ``bulk_create`` and one stock UPDATE. Returns one result dict per row, in
+    input order, with ``status`` ``created``, ``updated`` or ``error``.
+    """
+    results = [None] * len(rows)
+    valid, seen, sku_owners = [], set(), {}
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            results[index] = {'row': index, 'status': 'error', 'errors': {'row': 'Expected an object.'}}
+            continue
+        key, values, stock, errors = clean_row(row)
+        if not errors and key in seen:
+            errors = {key[0]: 'Duplicate row for this product.'}
+        elif not errors and sku_owners.get(values.get('sku'), key) != key:
+            errors = {'sku': 'Another row in this feed uses this sku.'}
+        if errors:
+            results[index] = {'row': index, 'status': 'error', 'errors': errors}
+            continue
+        seen.add(key)
+        if values.get('sku'):
+            sku_owners[values['sku']] = key
+        valid.append((index, key, values, stock))
+
+    for start in range(0, len(valid), chunk_size):
+        _apply_chunk(valid[start:start + chunk_size], results)
+    return results
@@ -0,0 +1,230 @@
+import hashlib
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+VERSION_PREFIX = 'shop:version:'
+PAGE_PREFIX = 'shop:page:'
+CSRF_PLACEHOLDER = '__shop_csrf_token__'
+CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+# Inside bulk_invalidation() holds a ``pending`` set of scopes to bump at exit
+_local = threading.local()
+
+
+def page_cache_timeout():
+    return getattr(settings, 'SHOP_PAGE_CACHE_TIMEOUT', 600)
+
+
+def get_versions(*scopes):
+    """Current version of each cache scope, e.g. ``'catalog'`` or ``'product:7'``"""
+    keys = {VERSION_PREFIX + scope: scope for scope in scopes}
+    found = cache.get_many(keys)
+    versions = {}
+    for key, scope in keys.items():
+        if key not in found:
+            # Seed from the clock so an evicted version never repeats an old one
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+        versions[scope] = found[key]
+    return versions
+
+
+async def aget_versions(*scopes):
+    """``get_versions`` for async views; the cache I/O stays off the event loop"""
+    keys = {VERSION_PREFIX + scope: scope for scope in scopes}
+    found = await cache.aget_many(keys)
+    versions = {}
+    for key, scope in keys.items():
+        if key not in found:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            found[key] = await cache.aget(key)
+        versions[scope] = found[key]
+    return versions
+
+
+def _bump(scopes):
+    for scope in scopes:
+        key = VERSION_PREFIX + scope
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+        else:
+            # BaseCache.incr (file, database and locmem backends) re-sets the
+            # key with the default timeout; versions must never expire
+            cache.touch(key, None)
+
+
+def invalidate(*scopes):
+    """Bump the given scopes once the current transaction commits"""
+    pending = getattr(_local, 'pending', None)
+    if pending is not None:
+        pending.update(scopes)
+        return
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+@contextmanager
+def bulk_invalidation():
+    """Coalesce the invalidations of a bulk edit into one bump per scope"""
+    if getattr(_local, 'pending', None) is not None:
+        yield
+        return
+    _local.pending = set()
+    try:
+        yield
+    finally:
+        scopes, _local.pending = _local.pending, None
+        if scopes:
+            invalidate(*scopes)
+
+
+def product_scopes(product_id, *category_ids, featured=False):
+    scopes = {'catalog', f'product:{product_id}'}
+    scopes.update(f'category:{category_id}' for category_id in category_ids if category_id)
+    if featured:
+        scopes.add('featured')
+    return scopes
+
+
+def invalidate_products(products):
+    """Invalidate pages showing ``products`` after writes that bypass model signals"""
+    scopes = set()
+    for product in products:
+        # Loaded state from shop.signals, so a moved product leaves its old category too
+        old_category_id, was_featured = getattr(product, '_cached_state', (None, False))
+        scopes |= product_scopes(
+            product.pk, old_category_id, product.category_id, featured=was_featured or product.featured,
+        )
+    if scopes:
+        invalidate(*scopes)
+
+
+def depend_on(request, *scopes):
+    """Record that the page being built for ``request`` shows data from ``scopes``
+
+    Versions are read at call time, so declare a scope before querying the
+    data it covers.
+    """
+    if hasattr(request, '_cache_dependencies'):
+        request._cache_dependencies.update(get_versions(*scopes))
+
+
+async def adepend_on(request, *scopes):
+    if hasattr(request, '_cache_dependencies'):
+        request._cache_dependencies.update(await aget_versions(*scopes))
+
+
+def _page_key(request):
+    query = sorted((key, value) for key, values in request.GET.lists() for value in values)
+    raw = f'{request.get_host()}{request.path}?{query}'
+    return PAGE_PREFIX + hashlib.md5(raw.encode()).hexdigest()
+
+
+def _is_cacheable(request):
+    # No session or message cookie means an anonymous visitor without a cart
+    # or flash messages, so the page is the same for every such visitor
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and 'messages' not in request.COOKIES
+    )
+
+
+def _cached_response(request, entry):
+    content = entry['content'].replace(CSRF_PLACEHOLDER, get_token(request))
+    response = HttpResponse(content, status=entry['status'])
+    for header, value in entry['headers']:
+        response[header] = value
+    response['X-Page-Cache'] = 'hit'
+    return response
+
+
+def _lookup_page(request):
+    """Cache key for ``request`` and the cached response, if still current"""
+    key = _page_key(request)
+    entry = cache.get(key)
+    if entry and get_versions(*entry['dependencies']) == entry['dependencies']:
+        return key, _cached_response(request, entry)
+    request._cache_dependencies = {}
+    return key, None
+
+
+async def _alookup_page(request):
+    key = _page_key(request)
+    entry = await cache.aget(key)
+    if entry and await aget_versions(*entry['dependencies']) == entry['dependencies']:
+        return key, _cached_response(request, entry)
+    request._cache_dependencies = {}
+    return key, None
+
+
+def _page_entry(request, response):
+    """What to cache for ``response``, or None if it must not be cached"""
+    if response.status_code != 200 or response.streaming or not request._cache_dependencies:
+        return None
+    content = CSRF_INPUT_RE.sub(r'\g<1>%s\g<2>' % CSRF_PLACEHOLDER, response.content.decode(response.charset))
+    entry = {
+        'content': content,
+        'status': response.status_code,
+        'headers': [(k, v) for k, v in response.items() if k.lower() != 'set-cookie'],
+        'dependencies': request._cache_dependencies,
+    }
+    response['X-Page-Cache'] = 'miss'
+    return entry
+
+
+def _store_page(request, key, response):
+    entry = _page_entry(request, response)
+    if entry is not None:
+        cache.set(key, entry, page_cache_timeout())
+    return response
+
+
+async def _astore_page(request, key, response):
+    entry = _page_entry(request, response)
+    if entry is not None:
+        await cache.aset(key, entry, page_cache_timeout())
+    return response
+
+
+def cache_anonymous_page(view):
+    """Serve whole pages to anonymous visitors from the cache
+
+    Pages are keyed on host, path and query parameters. Each entry keeps the
+    versions of the scopes the view declared with ``depend_on`` and is only
+    served while all of them are still current, so model signals invalidate
+    exactly the pages showing changed data. CSRF tokens are swapped for a
+    fresh one on every hit. Works on sync and async views.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if not _is_cacheable(request):
+                return await view(request, *args, **kwargs)
+            key, response = await _alookup_page(request)
+            if response is not None:
+                return response
+            return await _astore_page(request, key, await view(request, *args, **kwargs))
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not _is_cacheable(request):
+            return view(request, *args, **kwargs)
+        key, response = _lookup_page(request)
+        if response is not None:
+            return response
+        return _store_page(request, key, view(request, *args, **kwargs))
+    return wrapper
@@ -0,0 +1,108 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+
+from .cache import get_versions, invalidate
+from .models import Cart, CartItem
+
+SESSION_KEY = 'cart_summary'
+CENTS = Decimal('0.01')
+
+
+def _serialize(summary):
+    # SQLite sums decimals without their scale
+    return {'count': summary['count'], 'total': str(Decimal(summary['total']).quantize(CENTS))}
+
+
+def find_cart(request):
+    """The current visitor's cart, or None"""
+    if request.user.is_authenticated:
+        return Cart.objects.filter(user=request.user).first()
+    session_cart = request.session.get('cart')
+    if session_cart:
+        return Cart.objects.filter(id=session_cart.get('id'), user=None).first()
+    return None
+
+
+def cart_scopes(cart_id=None, user_id=None):
+    """Cache scopes bumped by shop.signals when a cart or its lines change"""
+    scopes = [f'cart:{cart_id}'] if cart_id else []
+    if user_id:
+        # A user's cart can be created or deleted from another session
+        scopes.append(f'user-cart:{user_id}')
+    return scopes
+
+
+def remember_cart_summary(request, cart):
+    """Store the cart's item count and total in the session for the header badge
+
+    Call after every change to the visitor's cart; pass ``None`` once it is gone.
+    The summary keeps the versions of the cart's cache scopes, so changes made
+    elsewhere (other sessions, checkout, the admin, the reaper) are noticed.
+    """
+    if cart is not None:
+        user_id = cart.user_id
+    else:
+        user = getattr(request, 'user', None)
+        user_id = user.pk if user is not None and user.is_authenticated else None
+    # Versions first, so a change made while summing is not missed
+    versions = get_versions(*cart_scopes(cart.pk if cart else None, user_id))
+    summary = cart.summary() if cart else {'count': 0, 'total': Decimal('0')}
+    request.session[SESSION_KEY] = {**_serialize(summary), 'versions': versions}
+
+
+def get_cart_summary(request):
+    """Cart totals for the header, read from the session while still current"""
+    summary = request.session.get(SESSION_KEY)
+    if summary is not None and 'versions' in summary and get_versions(*summary['versions']) == summary['versions']:
+        return summary
+    cart = find_cart(request)
+    if cart is None and summary is None:
+        # Don't start a session just to remember an empty cart
+        return {'count': 0, 'total': '0.00'}
+    remember_cart_summary(request, cart)
+    return request.session[SESSION_KEY]
+
+
+def merge_guest_cart(cart_id, user):
+    """Move the lines of guest cart ``cart_id`` into ``user``'s cart and delete it
+
+    Runs in one transaction with a fixed number of queries: both carts are
+    read at once, quantities for the same product are added together and
+    clamped to stock, and the result is written with a single upsert on the
+    ``(cart, product)`` unique constraint. Returns the user's cart, or None
+    if there was no such guest cart.
+    """
+    with transaction.atomic():
+        lines = CartItem.objects.filter(
+            Q(cart_id=cart_id, cart__user=None) | Q(cart__user=user)
+        ).values_list('cart_id', 'product_id', 'quantity', 'product__stock_quantity')
+        guest_lines, existing = [], {}
+        for line_cart_id, product_id, quantity, stock in lines:
+            if line_cart_id == cart_id:
+                guest_lines.append((product_id, quantity, stock))
+            else:
+                existing[product_id] = quantity
+
+        deleted, _ = Cart.objects.filter(id=cart_id, user=None).delete()
+        if not deleted:
+            return None
+        user_cart, _ = Cart.objects.get_or_create(user=user)
+        if not guest_lines:
+            return user_cart
+
+        merged = []
+        for product_id, quantity, stock in guest_lines:
+            quantity = min(existing.get(product_id, 0) + quantity, stock)
+            if quantity > 0:
+                merged.append(CartItem(cart=user_cart, product_id=product_id, quantity=quantity))
+        CartItem.objects.bulk_create(
+            merged,
+            update_conflicts=True,
+            unique_fields=['cart', 'product'],
+            update_fields=['quantity'],
+        )
+        # The upsert bypasses the CartItem signals
+        invalidate(*cart_scopes(user_cart.pk))
+    return user_cart
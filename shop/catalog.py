@@ -0,0 +1,92 @@
+from django.db.models import BooleanField, ExpressionWrapper, Q
+
+from .models import Category, Product
+from .search import search_products
+
+SORT_ORDERS = {
+    'price_low': ('effective_price',),
+    'price_high': ('-effective_price',),
+    'name': ('title',),
+    'created_at': ('-created_at',),
+}
+
+
+def with_listing_data(queryset):
+    """Join the category and precompute the values product cards display
+
+    Effective price and ratings are stored on ``Product`` and need no annotation.
+    """
+    return queryset.select_related('category').annotate(
+        is_in_stock=ExpressionWrapper(Q(stock_quantity__gt=0), output_field=BooleanField()),
+    )
+
+
+def active_products():
+    """All sellable products with listing annotations"""
+    return with_listing_data(Product.objects.filter(is_active=True))
+
+
+def product_listing(category_id=None, search_query=None, sort_by='created_at'):
+    """Filtered and sorted listing queryset for the storefront"""
+    products = Product.objects.filter(is_active=True)
+    if category_id:
+        products = products.filter(category_id=category_id)
+    if search_query:
+        products = search_products(products, search_query)
+
+    if sort_by == 'relevance' and search_query:
+        ordering = ('search_rank', '-created_at')
+    else:
+        ordering = SORT_ORDERS.get(sort_by, SORT_ORDERS['created_at'])
+    return with_listing_data(products).order_by(*ordering)
+
+
+def categories():
+    """Categories for the storefront sidebar"""
+    return list(Category.objects.all())
+
+
+def featured_products(limit=4):
+    return list(active_products().filter(featured=True).order_by('-created_at')[:limit])
+
+
+def _product_detail(product_id):
+    return active_products().prefetch_related('images').filter(pk=product_id)
+
+
+def _reviews(product):
+    return product.reviews.select_related('user').order_by('-created_at')
+
+
+def _related(product, limit):
+    return (
+        active_products()
+        .filter(category_id=product.category_id)
+        .exclude(pk=product.pk)
+        .order_by('-created_at')[:limit]
+    )
+
+
+def product_detail(product_id):
+    """Single active product with its gallery; raises ``Product.DoesNotExist``"""
+    return _product_detail(product_id).get()
+
+
+def product_reviews(product):
+    return list(_reviews(product))
+
+
+def related_products(product, limit=4):
+    return list(_related(product, limit))
+
+
+async def aproduct_detail(product_id):
+    return await _product_detail(product_id).aget()
+
+
+async def aproduct_reviews(product):
+    return [review async for review in _reviews(product)]
+
+
+async def arelated_products(product, limit=4):
+    return [related async for related in _related(product, limit)]
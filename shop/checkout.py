@@ -0,0 +1,95 @@
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+
+from .cache import invalidate_products
+from .models import CartItem, Order, OrderItem, Product
+
+
+class InsufficientStock(Exception):
+    """Raised when some cart lines can no longer be fulfilled
+
+    ``items`` lists one dict per short line with ``product_id``, ``title``,
+    ``requested`` and ``available`` keys.
+    """
+
+    def __init__(self, items):
+        self.items = items
+        super().__init__(', '.join(f"{item['title']} ({item['available']} left)" for item in items))
+
+
+class EmptyCart(Exception):
+    """Raised when checking out a cart without items"""
+
+
+def _shortages(quantities):
+    """Describe the lines whose product cannot cover the requested quantity"""
+    products = Product.objects.filter(pk__in=quantities).only('title', 'stock_quantity', 'is_active')
+    found = {product.pk: product for product in products}
+    shortages = []
+    for product_id, requested in quantities.items():
+        product = found.get(product_id)
+        available = product.stock_quantity if product and product.is_active else 0
+        if available < requested:
+            shortages.append({
+                'product_id': product_id,
+                'title': product.title if product else '',
+                'requested': requested,
+                'available': max(available, 0),
+            })
+    return shortages
+
+
+class _ReservationFailed(Exception):
+    pass
+
+
+def _reserve_stock(quantities):
+    """Decrement stock for every line in one conditional UPDATE; True if all lines fit"""
+    enough_stock = Q()
+    for product_id, quantity in quantities.items():
+        enough_stock |= Q(pk=product_id, stock_quantity__gte=quantity)
+    reserved = Product.objects.filter(enough_stock, is_active=True).update(
+        stock_quantity=Case(
+            *[When(pk=product_id, then=F('stock_quantity') - quantity)
+              for product_id, quantity in quantities.items()],
+            default=F('stock_quantity'),
+        )
+    )
+    return reserved == len(quantities)
+
+
+def place_order(cart, user, **details):
+    """Turn ``cart`` into an order in a single transaction and return it
+
+    Stock is reserved first with one conditional UPDATE, which takes the
+    product row locks (and the SQLite write lock) before anything is read.
+    If any line is short the transaction is rolled back and
+    ``InsufficientStock`` is raised. ``details`` are the address and
+    contact fields stored on the order.
+    """
+    lines = list(cart.items.values_list('id', 'product_id', 'quantity'))
+    if not lines:
+        raise EmptyCart()
+    quantities = {product_id: quantity for _, product_id, quantity in lines}
+
+    try:
+        with transaction.atomic():
+            if not _reserve_stock(quantities):
+                raise _ReservationFailed()
+
+            products = Product.objects.in_bulk(list(quantities))
+            order = Order.objects.create(
+                user=user,
+                total_amount=sum(products[pk].get_price * quantity for pk, quantity in quantities.items()),
+                **details,
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=products[pk], quantity=quantity, price=products[pk].get_price)
+                for pk, quantity in quantities.items()
+            ])
+            CartItem.objects.filter(pk__in=[line_id for line_id, _, _ in lines]).delete()
+            # The stock UPDATE bypasses model signals
+            invalidate_products(products.values())
+    except _ReservationFailed:
+        raise InsufficientStock(_shortages(quantities)) from None
+    return order
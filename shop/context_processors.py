@@ -0,0 +1,8 @@
+from django.utils.functional import SimpleLazyObject
+
+from .cart import get_cart_summary
+
+
+def cart_summary(request):
+    """Expose ``cart_summary`` (count, total) without querying the cart tables"""
+    return {'cart_summary': SimpleLazyObject(lambda: get_cart_summary(request))}
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import logging
+import random
+import re
+import statistics
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# A context variable rather than a thread local: under ASGI, templates render
+# in a sync_to_async thread that inherits the request's context
+_profile = ContextVar('shop_instrumentation_profile', default=None)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LIST_RE = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+SQL_SAMPLE_LENGTH = 200
+
+
+def fingerprint(sql):
+    """Digest of a statement with literals and parameter lists collapsed, so
+    ``WHERE id = 1`` and ``WHERE id = 2`` count as the same query"""
+    normalized = _NUMBER_RE.sub('?', _STRING_RE.sub('?', sql))
+    normalized = _LIST_RE.sub('(...)', normalized)
+    return hashlib.md5(normalized.encode()).hexdigest()[:12]
+
+
+class RequestProfile:
+    """Queries and template time of one sampled request
+
+    Installed as a ``connection.execute_wrapper`` for the request, so it
+    sees every statement regardless of DEBUG.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.template_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, (time.perf_counter() - started) * 1000))
+
+    @property
+    def db_ms(self):
+        return sum(ms for _, ms in self.queries)
+
+    def duplicates(self, limit=5):
+        """The most repeated statements, the usual sign of an N+1 loop"""
+        counts = Counter()
+        samples = {}
+        for sql, _ in self.queries:
+            key = fingerprint(sql)
+            counts[key] += 1
+            samples.setdefault(key, sql[:SQL_SAMPLE_LENGTH])
+        return [
+            {'fingerprint': key, 'count': count, 'sql': samples[key]}
+            for key, count in counts.most_common(limit) if count > 1
+        ]
+
+
+def install_template_timing():
+    """Wrap the Django template backend so sampled requests add up render time
+
+    Only the backend ``Template.render`` is wrapped: it is called once per
+    ``render()``/``render_to_string()``, while ``{% include %}`` and
+    inclusion tags render engine templates inside it and are not counted twice.
+    """
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, 'instrumented', False):
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        profile = _profile.get()
+        if profile is None:
+            return original(self, context, request)
+        started = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            profile.template_ms += (time.perf_counter() - started) * 1000
+
+    render.instrumented = True
+    Template.render = render
+
+
+def view_name(request):
+    """``shop:index`` for site views, ``api:products:list`` for tastypie resources"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    resource = match.kwargs.get('resource_name')
+    if resource and match.url_name:
+        action = match.url_name.removeprefix('api_dispatch_').removeprefix('api_')
+        return f'api:{resource}:{action}'
+    return match.view_name or match._func_path
+
+
+def server_timing(profile, total_ms):
+    return (
+        f'db;dur={profile.db_ms:.1f};desc="{len(profile.queries)} queries", '
+        f'tpl;dur={profile.template_ms:.1f}, '
+        f'app;dur={total_ms:.1f}'
+    )
+
+
+def _wrap_connections(stack, profile):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(profile))
+
+
+class InstrumentationMiddleware:
+    """Samples requests and records their SQL and render cost
+
+    ``SHOP_INSTRUMENTATION_SAMPLE_RATE`` of the requests (0 turns it off)
+    get a JSON line on the ``shop.instrumentation`` logger and a
+    ``Server-Timing`` header with database, template and total time. The
+    rest only pay for one ``random()`` call. ``request_report`` aggregates
+    the log.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install_template_timing()
+
+    @staticmethod
+    def sampled():
+        rate = getattr(settings, 'SHOP_INSTRUMENTATION_SAMPLE_RATE', 0)
+        return rate and random.random() < rate
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _profile.set(profile)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                _wrap_connections(stack, profile)
+                response = self.get_response(request)
+        finally:
+            _profile.reset(token)
+        return self.record(request, response, profile, started)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        profile = RequestProfile()
+        token = _profile.set(profile)
+        started = time.perf_counter()
+        # The ORM runs async queries through sync_to_async on the request's
+        # thread, so that is where the connections have to be wrapped
+        stack = ExitStack()
+        await sync_to_async(_wrap_connections)(stack, profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _profile.reset(token)
+        return self.record(request, response, profile, started)
+
+    def record(self, request, response, profile, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        response['Server-Timing'] = server_timing(profile, total_ms)
+        duplicates = profile.duplicates()
+        logger.info(json.dumps({
+            'view': view_name(request),
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(total_ms, 3),
+            'db_ms': round(profile.db_ms, 3),
+            'queries': len(profile.queries),
+            'duplicate_queries': sum(item['count'] - 1 for item in duplicates),
+            'duplicates': duplicates,
+            'template_ms': round(profile.template_ms, 3),
+            'timestamp': time.time(),
+        }))
+        return response
+
+
+def read_records(lines):
+    """Instrumentation records from log lines, skipping anything that is not one"""
+    for line in lines:
+        start = line.find('{')
+        if start == -1:
+            continue
+        try:
+            record = json.loads(line[start:])
+        except ValueError:
+            continue
+        if isinstance(record, dict) and 'view' in record and 'duration_ms' in record:
+            yield record
+
+
+def summarize(records, sort='p95_ms'):
+    """Per-view rows of latency, query and N+1 statistics, worst first"""
+    from .benchmark import percentile
+
+    by_view = defaultdict(list)
+    for record in records:
+        by_view[record['view']].append(record)
+
+    rows = []
+    for view, items in by_view.items():
+        durations = [item['duration_ms'] for item in items]
+        repeated, samples = Counter(), {}
+        for item in items:
+            for duplicate in item.get('duplicates', []):
+                repeated[duplicate['fingerprint']] += duplicate['count']
+                samples.setdefault(duplicate['fingerprint'], duplicate['sql'])
+        rows.append({
+            'view': view,
+            'requests': len(items),
+            'p50_ms': round(percentile(durations, 50), 3),
+            'p95_ms': round(percentile(durations, 95), 3),
+            'max_ms': round(max(durations), 3),
+            'db_ms_mean': round(statistics.fmean(item['db_ms'] for item in items), 3),
+            'template_ms_mean': round(statistics.fmean(item.get('template_ms', 0) for item in items), 3),
+            'queries_mean': round(statistics.fmean(item['queries'] for item in items), 2),
+            'queries_max': max(item['queries'] for item in items),
+            'duplicate_queries_max': max(item.get('duplicate_queries', 0) for item in items),
+            'top_duplicate': None,
+        })
+        if repeated:
+            key, count = repeated.most_common(1)[0]
+            rows[-1]['top_duplicate'] = {'fingerprint': key, 'count': count, 'sql': samples[key]}
+    rows.sort(key=lambda row: row[sort], reverse=True)
+    return rows
@@ -0,0 +1,143 @@
+import asyncio
+import itertools
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+
+from .benchmark import percentile
+
+SERVER_MODES = ('wsgi', 'asgi')
+
+
+class LoadResult:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.statuses = {}
+
+    def as_dict(self, duration):
+        timings = self.latencies
+        return {
+            'requests': len(timings),
+            'requests_per_second': round(len(timings) / duration, 1),
+            'p50_ms': round(percentile(timings, 50), 2) if timings else None,
+            'p95_ms': round(percentile(timings, 95), 2) if timings else None,
+            'p99_ms': round(percentile(timings, 99), 2) if timings else None,
+            'errors': self.errors,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+        }
+
+
+def _request(path, cookie=None):
+    lines = [f'GET {path} HTTP/1.1', 'Host: localhost', 'Connection: close']
+    if cookie:
+        lines.append(f'Cookie: {cookie}')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode()
+
+
+async def fetch(port, path, cookie=None, timeout=30):
+    """Status code of one request on a fresh connection, as a browser behind no proxy would"""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+    try:
+        writer.write(_request(path, cookie))
+        await writer.drain()
+        data = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    return int(data.split(b' ', 2)[1])
+
+
+async def _client(port, requests, deadline, result):
+    while time.perf_counter() < deadline:
+        path, cookie = next(requests)
+        started = time.perf_counter()
+        try:
+            status = await fetch(port, path, cookie, timeout=max(deadline - started, 0.1) + 5)
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            result.errors += 1
+            continue
+        result.statuses[status] = result.statuses.get(status, 0) + 1
+        if status >= 500:
+            result.errors += 1
+        else:
+            result.latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def _slow_client(port, deadline):
+    """Sends its headers one at a time and never finishes, like a phone on a bad network"""
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    except OSError:
+        return
+    try:
+        writer.write(b'GET / HTTP/1.1\r\nHost: localhost\r\n')
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(0.5)
+            writer.write(b'X-Slow: 1\r\n')
+            await writer.drain()
+    except OSError:
+        pass
+    finally:
+        writer.close()
+
+
+async def run_load(port, paths, connections=50, duration=10, slow_clients=0):
+    """Hammer the server with ``connections`` concurrent clients for ``duration`` seconds
+
+    ``paths`` is a list of ``(path, cookie)`` requests taken round-robin.
+    """
+    requests = itertools.cycle(paths)
+    result = LoadResult()
+    deadline = time.perf_counter() + duration
+    slow = [asyncio.create_task(_slow_client(port, deadline)) for _ in range(slow_clients)]
+    # Let the slow clients take their connections first
+    await asyncio.sleep(0.2 if slow_clients else 0)
+    await asyncio.gather(*(_client(port, requests, deadline, result) for _ in range(connections)))
+    await asyncio.gather(*slow)
+    return result.as_dict(duration)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """gunicorn in WSGI or ASGI mode (see gunicorn.conf.py) on a local port"""
+
+    def __init__(self, mode, workers=2, port=None):
+        self.mode = mode
+        self.workers = workers
+        self.port = port or free_port()
+        self.process = None
+
+    def __enter__(self):
+        env = {**os.environ, 'SERVER_MODE': self.mode}
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+             '--workers', str(self.workers), '--bind', f'127.0.0.1:{self.port}', '--log-level', 'warning'],
+            cwd=settings.BASE_DIR, env=env,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'gunicorn exited with code {self.process.returncode}')
+            try:
+                asyncio.run(fetch(self.port, '/', timeout=5))
+                return self
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError('gunicorn did not start within 30 seconds')
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
@@ -0,0 +1,56 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.benchmark import BenchmarkSuite, compare, load_report
+from shop.synthetic import SyntheticCatalog
+
+
+class Command(BaseCommand):
+    help = 'Measures latency percentiles, queries and memory of the storefront and API hot paths'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--only', nargs='+', metavar='SCENARIO', help='Run just these scenarios')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--compare', metavar='BASELINE', help='Report metrics that changed against an earlier report')
+        parser.add_argument('--threshold', type=float, default=0.1, help='Relative change worth reporting')
+        parser.add_argument(
+            '--generate', type=int, metavar='PRODUCTS',
+            help='Replace ALL shop data with a synthetic catalog of this many products first',
+        )
+
+    def handle(self, *args, **options):
+        if options['generate']:
+            products = options['generate']
+            catalog = SyntheticCatalog(log=self.stdout.write)
+            catalog.flush()
+            catalog.generate(
+                categories=20, users=max(products // 100, 50), products=products,
+                carts=max(products // 100, 50), orders=max(products // 20, 100),
+            )
+
+        suite = BenchmarkSuite(iterations=options['iterations'], warmup=options['warmup'])
+        self.stdout.write(f"{'scenario':<20} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'peak KiB':>9}")
+        try:
+            report = suite.run(only=options['only'], log=lambda r: self.stdout.write(
+                f"{r['name']:<20} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} {r['p99_ms']:9.2f} "
+                f"{r['queries_mean']:8.1f} {r['peak_memory_kib']:9.0f}"
+                + ('' if r['statuses'] in ([200], [302]) else f"  statuses {r['statuses']}")
+            ))
+        except ValueError as e:
+            raise CommandError(e)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}."))
+
+        if options['compare']:
+            rows = compare(load_report(options['compare']), report, options['threshold'])
+            if not rows:
+                self.stdout.write('No metric moved by more than the threshold.')
+            for name, metric, before, after, change in rows:
+                style = self.style.ERROR if change > 0 else self.style.SUCCESS
+                self.stdout.write(style(f'{name:<20} {metric:<16} {before:>10} -> {after:<10} ({change:+.0%})'))
@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from base.database import PROFILES
+from shop.benchmark import cart_worker, prepare_concurrency_fixtures, summarize_workers
+
+
+class Command(BaseCommand):
+    help = 'Measures concurrent cart and checkout throughput under each database profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default='sqlite-default,sqlite-wal',
+                            help=f'Comma-separated, from: {", ".join(PROFILES)}. '
+                                 'Postgres profiles use DATABASE_URL, which must be a disposable database.')
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent processes, like gunicorn workers')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per profile')
+        parser.add_argument('--products', type=int, default=200)
+        parser.add_argument('--checkout-every', type=int, default=5)
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        # Internal: the steps run in child processes under each profile
+        parser.add_argument('--prepare', action='store_true', help=argparse.SUPPRESS)
+        parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+        parser.add_argument('--start-at', type=float, help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['prepare']:
+            prepare_concurrency_fixtures(options['workers'], options['products'])
+            return
+        if options['worker'] is not None:
+            time.sleep(max(options['start_at'] - time.time(), 0))
+            result = cart_worker(options['worker'], options['duration'], options['checkout_every'])
+            self.stdout.write(json.dumps(result))
+            return
+
+        profiles = [profile.strip() for profile in options['profiles'].split(',') if profile.strip()]
+        for profile in profiles:
+            if profile not in PROFILES:
+                raise CommandError(f'Unknown profile {profile!r}; choose from {", ".join(PROFILES)}.')
+            if profile.startswith('postgres') and not os.environ.get('DATABASE_URL'):
+                raise CommandError(f'{profile} needs DATABASE_URL.')
+
+        rows = [self.run_profile(profile, options) for profile in profiles]
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(rows, f, indent=2)
+
+        self.stdout.write(f"\n{'profile':16} {'req/s':>8} {'add/s':>7} {'checkout/s':>11} "
+                          f"{'add p95':>9} {'cart p95':>9} {'checkout p95':>13} {'errors':>7}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['profile']:16} {row['requests_per_second']:>8} {row['add_per_second']:>7} "
+                f"{row['checkout_per_second']:>11} {row['add_p95_ms'] or '-':>9} {row['cart_p95_ms'] or '-':>9} "
+                f"{row['checkout_p95_ms'] or '-':>13} {row['errors']:>7}"
+            )
+
+    def _manage(self, env, *args):
+        return [sys.executable, '-m', 'django', *args], {'env': env, 'cwd': settings.BASE_DIR}
+
+    def run_profile(self, profile, options):
+        self.stdout.write(f'Running {profile} with {options["workers"]} workers for {options["duration"]}s...')
+        with tempfile.TemporaryDirectory() as directory:
+            env = {**os.environ, 'DB_PROFILE': profile}
+            if profile.startswith('sqlite'):
+                env['SQLITE_PATH'] = os.path.join(directory, 'benchmark.sqlite3')
+            for step in (['migrate', '--noinput', '-v0'],
+                         ['benchmark_db', '--prepare', '--workers', str(options['workers']),
+                          '--products', str(options['products'])]):
+                command, kwargs = self._manage(env, *step)
+                subprocess.run(command, check=True, **kwargs)
+
+            # Start every worker at the same moment, once Django has loaded
+            start_at = time.time() + 3
+            processes = []
+            for worker in range(options['workers']):
+                command, kwargs = self._manage(
+                    env, 'benchmark_db', '--worker', str(worker), '--start-at', str(start_at),
+                    '--duration', str(options['duration']), '--checkout-every', str(options['checkout_every']),
+                )
+                processes.append(subprocess.Popen(command, stdout=subprocess.PIPE, text=True, **kwargs))
+            results = []
+            for process in processes:
+                stdout, _ = process.communicate()
+                if process.returncode:
+                    raise CommandError(f'A {profile} worker failed with exit code {process.returncode}.')
+                results.append(json.loads(stdout.strip().splitlines()[-1]))
+        return summarize_workers(profile, results, options['duration'])
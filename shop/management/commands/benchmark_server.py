@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from shop.loadtest import SERVER_MODES, Server, run_load
+from shop.models import Order, Product
+
+
+class Command(BaseCommand):
+    help = 'Compares concurrent-connection throughput of the WSGI and ASGI servers on the read paths'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default=','.join(SERVER_MODES))
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+        parser.add_argument('--connections', type=int, default=50, help='Concurrent clients')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per mode')
+        parser.add_argument('--slow-clients', type=int, default=0,
+                            help='Extra clients that trickle their headers and never finish the request')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def paths(self):
+        product_ids = list(Product.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True)[:20])
+        order = Order.objects.select_related('user').first()
+        if not product_ids or order is None:
+            raise CommandError('The benchmark needs products and orders; run the seed command first.')
+        client = Client()
+        client.force_login(order.user)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        paths = [(reverse('shop:index'), None), (reverse('shop:index') + '?sort=price_low', None)]
+        paths += [(reverse('shop:product_detail', args=[pk]), None) for pk in product_ids]
+        paths += [(reverse('shop:cart'), cookie), (reverse('shop:order_history'), cookie),
+                  ('/api/v1/products/?format=json&limit=20', None)]
+        return paths
+
+    def handle(self, *args, **options):
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        for mode in modes:
+            if mode not in SERVER_MODES:
+                raise CommandError(f'Unknown mode {mode!r}; choose from {", ".join(SERVER_MODES)}.')
+        paths = self.paths()
+
+        rows = []
+        for mode in modes:
+            self.stdout.write(f'Running {mode} with {options["workers"]} workers, {options["connections"]} connections '
+                              f'and {options["slow_clients"]} slow clients for {options["duration"]}s...')
+            with Server(mode, workers=options['workers']) as server:
+                result = asyncio.run(run_load(
+                    server.port, paths, connections=options['connections'],
+                    duration=options['duration'], slow_clients=options['slow_clients'],
+                ))
+            rows.append({'mode': mode, **result})
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(rows, f, indent=2)
+        self.stdout.write(f"\n{'mode':6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['mode']:6} {row['requests_per_second']:>8} {row['p50_ms'] or '-':>9} "
+                f"{row['p95_ms'] or '-':>9} {row['p99_ms'] or '-':>9} {row['errors']:>7}"
+            )
@@ -0,0 +1,41 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shop.bulk import read_csv, upsert_products
+
+
+class Command(BaseCommand):
+    help = 'Creates or updates products from a CSV or JSON feed keyed by id or sku'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'json'], help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        fmt = options['format'] or path.suffix.lstrip('.').lower()
+        try:
+            text = path.read_text(encoding='utf-8-sig')
+        except OSError as e:
+            raise CommandError(e)
+        if fmt == 'csv':
+            rows = read_csv(text)
+        elif fmt == 'json':
+            rows = json.loads(text)
+            if isinstance(rows, dict):
+                rows = rows.get('objects', [])
+        else:
+            raise CommandError('Use --format csv or --format json.')
+
+        results = upsert_products(rows, chunk_size=options['chunk_size'])
+        errors = [result for result in results if result['status'] == 'error']
+        for result in errors:
+            self.stderr.write(f"Row {result['row']}: {result['errors']}")
+        created = sum(result['status'] == 'created' for result in results)
+        updated = sum(result['status'] == 'updated' for result in results)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created} and updated {updated} products; {len(errors)} rows rejected.'
+        ))
@@ -0,0 +1,28 @@
+import threading
+
+from django.core.management.base import BaseCommand
+
+from shop.payments import process_events, run_forever
+
+
+class Command(BaseCommand):
+    help = 'Applies pending LiqPay payment events to their orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--limit', type=int, help='Process at most this many events')
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new events')
+        parser.add_argument('--interval', type=float, default=2, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        if options['loop']:
+            try:
+                run_forever(options['interval'], threading.Event(), options['batch_size'])
+            except KeyboardInterrupt:
+                pass
+            return
+        stats = process_events(batch_size=options['batch_size'], limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {stats['events']} payment events for {stats['orders']} orders "
+            f"in {stats['batches']} batches ({stats['seconds']}s, {stats['events_per_second']} events/s)."
+        ))
@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from shop.reaper import reap_carts
+
+
+class Command(BaseCommand):
+    help = 'Deletes abandoned guest carts and cart items for deactivated products'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Age of the guest carts to delete (default: SHOP_GUEST_CART_TTL_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--limit', type=int, help='Delete at most this many carts')
+
+    def handle(self, *args, **options):
+        max_age = timedelta(days=options['days']) if options['days'] is not None else None
+        stats = reap_carts(max_age=max_age, batch_size=options['batch_size'], limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {stats['carts']} guest carts and {stats['items']} inactive cart items "
+            f"in {stats['batches']} batches ({stats['seconds']}s, {stats['rows_per_second']} rows/s)."
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from shop.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the denormalized review aggregates on every product'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = rebuild_ratings(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Fixed the ratings of {updated} products.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from shop.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the product full-text search index'
+
+    def handle(self, *args, **options):
+        get_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
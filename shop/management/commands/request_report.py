@@ -0,0 +1,51 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from shop.instrumentation import read_records, summarize
+
+SORT_KEYS = ('p95_ms', 'p50_ms', 'max_ms', 'db_ms_mean', 'queries_mean', 'duplicate_queries_max', 'requests')
+
+
+class Command(BaseCommand):
+    help = 'Aggregates instrumentation logs into the slowest endpoints and their N+1 suspects'
+
+    def add_arguments(self, parser):
+        parser.add_argument('logs', nargs='*', help='Instrumentation log files (default: stdin)')
+        parser.add_argument('--sort', choices=SORT_KEYS, default='p95_ms')
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--json', action='store_true', help='Print the rows as JSON')
+
+    def handle(self, *args, **options):
+        records = []
+        if options['logs']:
+            for path in options['logs']:
+                with open(path, encoding='utf-8') as f:
+                    records.extend(read_records(f))
+        else:
+            records.extend(read_records(sys.stdin))
+
+        rows = summarize(records, sort=options['sort'])[:options['top']]
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        if not rows:
+            self.stdout.write('No instrumentation records found.')
+            return
+
+        self.stdout.write(
+            f"{'view':40} {'reqs':>6} {'p50 ms':>9} {'p95 ms':>9} {'db ms':>8} {'tpl ms':>8} {'queries':>8} {'dups':>5}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['view'][:40]:40} {row['requests']:>6} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} "
+                f"{row['db_ms_mean']:>8.1f} {row['template_ms_mean']:>8.1f} {row['queries_mean']:>8.1f} "
+                f"{row['duplicate_queries_max']:>5}"
+            )
+        suspects = [row for row in rows if row['top_duplicate'] and row['duplicate_queries_max'] >= 5]
+        if suspects:
+            self.stdout.write('\nRepeated queries (possible N+1):')
+            for row in suspects:
+                duplicate = row['top_duplicate']
+                self.stdout.write(f"  {row['view']}: {duplicate['count']}x {duplicate['sql']}")
@@ -0,0 +1,142 @@
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .thumbnails import DIRECTORY as THUMBNAIL_DIRECTORY
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def _byte_range(header, size):
+    """``(start, end)`` of a single-range ``Range`` header, ``None`` to send
+    the whole file, or ``False`` when the range cannot be satisfied"""
+    match = RANGE_RE.match(header.strip())
+    if not match or size == 0:
+        # Multiple ranges and other units are legal to ignore
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last or int(last) == 0:
+            return False
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def _read(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve an uploaded file with validators, byte ranges and cache headers
+
+    Thumbnails have content-hashed names and are cached as immutable; other
+    uploads are revalidated after ``SHOP_MEDIA_MAX_AGE`` seconds. With
+    ``SHOP_MEDIA_ACCEL_REDIRECT`` (nginx) or ``SHOP_MEDIA_SENDFILE`` (Apache,
+    lighttpd) set, the body is left to the front-end server.
+    """
+    try:
+        full_path = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat = full_path.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not full_path.is_file():
+        raise Http404
+
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = _file_response(request, path, full_path, stat.st_size, etag)
+
+    response.headers.setdefault('ETag', etag)
+    response.headers.setdefault('Last-Modified', http_date(stat.st_mtime))
+    response['Accept-Ranges'] = 'bytes'
+    if path.startswith(f'{THUMBNAIL_DIRECTORY}/'):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'SHOP_MEDIA_MAX_AGE', 86400))
+    return response
+
+
+def _file_response(request, path, full_path, size, etag):
+    content_type = mimetypes.guess_type(full_path.name)[0] or 'application/octet-stream'
+    accel_prefix = getattr(settings, 'SHOP_MEDIA_ACCEL_REDIRECT', '')
+    if accel_prefix or getattr(settings, 'SHOP_MEDIA_SENDFILE', False):
+        # The front-end server handles ranges and the body itself
+        response = HttpResponse(content_type=content_type)
+        if accel_prefix:
+            response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + path
+        else:
+            response['X-Sendfile'] = os.fspath(full_path)
+        return response
+
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and request.META.get('HTTP_IF_RANGE', etag) == etag:
+        byte_range = _byte_range(request.META['HTTP_RANGE'], size)
+    if byte_range is False:
+        response = HttpResponse(status=416, content_type=content_type)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        return FileResponse(open(full_path, 'rb'), content_type=content_type)
+
+    start, end = byte_range
+    response = StreamingHttpResponse(_read(full_path, start, end - start + 1), status=206, content_type=content_type)
+    response['Content-Length'] = str(end - start + 1)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that also runs natively under ASGI
+
+    WhiteNoise's middleware is sync-only, which would make Django run every
+    request below it through a thread. Static lookups are an in-memory dict
+    hit, so the async path serves them inline and awaits everything else.
+    """
+
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings=settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        static_file = self.find_file(request.path_info) if self.autorefresh else self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
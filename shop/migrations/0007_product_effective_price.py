@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 02:42
+
+from django.db import migrations, models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, NullIf
+
+
+def backfill_effective_price(apps, schema_editor):
+    Product = apps.get_model('shop', 'Product')
+    output_field = models.DecimalField(max_digits=10, decimal_places=2)
+    Product.objects.update(effective_price=Coalesce(
+        NullIf(F('discount_price'), Value(0, output_field=output_field)), F('price'),
+        output_field=output_field,
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0006_product_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.RunPython(backfill_effective_price, migrations.RunPython.noop),
+    ]
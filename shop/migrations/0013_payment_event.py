@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-18 03:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0012_storefront_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(default='liqpay', max_length=20)),
+                ('transaction_id', models.CharField(max_length=64)),
+                ('status', models.CharField(max_length=30)),
+                ('order_ref', models.CharField(blank=True, max_length=64)),
+                ('payload', models.JSONField()),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('outcome', models.CharField(blank=True, choices=[('applied', 'Applied'), ('ignored', 'Ignored'), ('unknown_order', 'Unknown order')], max_length=20)),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payment_events', to='shop.order')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('processed_at', None)), fields=['id'], name='shop_payment_pending_idx')],
+                'constraints': [models.UniqueConstraint(fields=('provider', 'transaction_id', 'status'), name='shop_payment_event_unique')],
+            },
+        ),
+    ]
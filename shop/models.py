@@ -1,4 +1,8 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.utils import timezone
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -9,6 +13,7 @@ class Category(models.Model):
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='categories/', blank=True, null=True)
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -17,11 +22,61 @@ class Category(models.Model):
         return self.title
 
 
+PRICE_FIELDS = {'price', 'discount_price'}
+
+
+def effective_price_expression(price=F('price'), discount_price=F('discount_price')):
+    """SQL equivalent of ``Product.get_price`` for the given price values"""
+    output_field = models.DecimalField(max_digits=10, decimal_places=2)
+    if not hasattr(price, 'resolve_expression'):
+        price = Value(price, output_field=output_field)
+    if not hasattr(discount_price, 'resolve_expression'):
+        discount_price = Value(discount_price, output_field=output_field)
+    return Coalesce(NullIf(discount_price, Value(0, output_field=output_field)), price, output_field=output_field)
+
+
+class ProductQuerySet(models.QuerySet):
+    """Keeps ``effective_price`` and ``updated_at`` in step on bulk writes"""
+
+    def update(self, **kwargs):
+        if PRICE_FIELDS & kwargs.keys():
+            kwargs['effective_price'] = effective_price_expression(
+                kwargs.get('price', F('price')), kwargs.get('discount_price', F('discount_price'))
+            )
+        # API validators and the changes feed rely on updated_at
+        kwargs.setdefault('updated_at', timezone.now())
+        return super().update(**kwargs)
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        objs, fields = list(objs), list(fields)
+        if PRICE_FIELDS & set(fields):
+            for obj in objs:
+                obj.effective_price = obj.get_price
+            if 'effective_price' not in fields:
+                fields.append('effective_price')
+        if 'updated_at' not in fields:
+            now = timezone.now()
+            for obj in objs:
+                obj.updated_at = now
+            fields.append('updated_at')
+        return super().bulk_update(objs, fields, batch_size=batch_size)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.effective_price = obj.get_price
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class Product(models.Model):
     title = models.CharField(max_length=300)
+    # Stock-keeping unit from the ERP; bulk imports match on it
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     discount_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    # Price the customer pays; kept in sync on save and by ProductQuerySet
+    effective_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
     stock_quantity = models.IntegerField(default=0)
     image = models.ImageField(upload_to='products/')
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
@@ -31,10 +86,56 @@ class Product(models.Model):
     dimensions = models.CharField(max_length=100, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
+    # Review aggregates, maintained by shop.ratings
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_count_1 = models.PositiveIntegerField(default=0, editable=False)
+    rating_count_2 = models.PositiveIntegerField(default=0, editable=False)
+    rating_count_3 = models.PositiveIntegerField(default=0, editable=False)
+    rating_count_4 = models.PositiveIntegerField(default=0, editable=False)
+    rating_count_5 = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset order of the changes feed in shop.sync
+            models.Index(fields=['updated_at', 'id'], name='shop_product_updated_idx'),
+            # Storefront listings (shop.catalog) only show active products and
+            # page by (sort key, id), with or without a category filter
+            models.Index(fields=['created_at', 'id'], name='shop_prod_new_idx', condition=Q(is_active=True)),
+            models.Index(fields=['category', 'created_at', 'id'], name='shop_prod_cat_new_idx',
+                         condition=Q(is_active=True)),
+            models.Index(fields=['effective_price', 'id'], name='shop_prod_price_idx', condition=Q(is_active=True)),
+            models.Index(fields=['category', 'effective_price', 'id'], name='shop_prod_cat_price_idx',
+                         condition=Q(is_active=True)),
+            models.Index(fields=['title', 'id'], name='shop_prod_title_idx', condition=Q(is_active=True)),
+            models.Index(fields=['category', 'title', 'id'], name='shop_prod_cat_title_idx',
+                         condition=Q(is_active=True)),
+            models.Index(fields=['created_at'], name='shop_prod_featured_idx',
+                         condition=Q(is_active=True, featured=True)),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.effective_price = self.get_price
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and PRICE_FIELDS & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'effective_price'}
+        super().save(*args, **kwargs)
+
+    @property
+    def average_rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    @property
+    def rating_histogram(self):
+        return {rating: getattr(self, f'rating_count_{rating}') for rating in range(5, 0, -1)}
+
     @property
     def get_price(self):
         return self.discount_price if self.discount_price else self.price
@@ -48,6 +149,20 @@ class Product(models.Model):
         return self.stock_quantity > 0
 
 
+class ProductTombstone(models.Model):
+    """Records a deleted product for the changes feed"""
+    product_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='shop_tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Product {self.product_id} deleted"
+
+
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='products/gallery/')
@@ -63,6 +178,12 @@ class Cart(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Finds stale guest carts for shop.reaper
+            models.Index(fields=['user', 'updated_at'], name='shop_cart_user_updated_idx'),
+        ]
+
     def __str__(self):
         if self.user:
             return f"Cart for {self.user.username}"
@@ -76,6 +197,14 @@ class Cart(models.Model):
     def total_items(self):
         return sum(item.quantity for item in self.items.all())
 
+    def summary(self):
+        """Item count and total price in one aggregate query"""
+        totals = self.items.aggregate(
+            count=models.Sum('quantity'),
+            total=models.Sum(F('quantity') * F('product__effective_price'), output_field=models.DecimalField()),
+        )
+        return {'count': totals['count'] or 0, 'total': totals['total'] or Decimal('0')}
+
 
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, related_name='items', on_delete=models.CASCADE)
@@ -115,6 +244,12 @@ class Order(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Order history, newest first
+            models.Index(fields=['user', 'created_at'], name='shop_order_user_created_idx'),
+        ]
+
     def __str__(self):
         return f"Order {self.order_number}"
 
@@ -125,6 +260,45 @@ class Order(models.Model):
         super().save(*args, **kwargs)
 
 
+class PaymentEvent(models.Model):
+    """A payment provider callback, recorded as received
+
+    Events are only ever inserted; ``shop.payments`` later fills in
+    ``processed_at`` and ``outcome`` when it applies them to the order.
+    Provider retries of the same callback hit the unique constraint and are
+    dropped.
+    """
+    OUTCOME_CHOICES = [
+        ('applied', 'Applied'),
+        ('ignored', 'Ignored'),
+        ('unknown_order', 'Unknown order'),
+    ]
+
+    provider = models.CharField(max_length=20, default='liqpay')
+    transaction_id = models.CharField(max_length=64)
+    status = models.CharField(max_length=30)
+    order_ref = models.CharField(max_length=64, blank=True)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(default=timezone.now)
+    order = models.ForeignKey(Order, null=True, blank=True, related_name='payment_events', on_delete=models.SET_NULL)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    outcome = models.CharField(max_length=20, choices=OUTCOME_CHOICES, blank=True)
+
+    class Meta:
+        constraints = [
+            # One row per provider transaction and status: retries are no-ops,
+            # while a later refund of the same transaction is a new event
+            models.UniqueConstraint(fields=['provider', 'transaction_id', 'status'], name='shop_payment_event_unique'),
+        ]
+        indexes = [
+            # The worker's queue: unprocessed events in arrival order
+            models.Index(fields=['id'], condition=Q(processed_at=None), name='shop_payment_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} {self.transaction_id} {self.status}"
+
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
@@ -149,6 +323,9 @@ class Review(models.Model):
 
     class Meta:
         unique_together = ('product', 'user')
+        indexes = [
+            models.Index(fields=['product', 'created_at'], name='shop_review_prod_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.product.title} ({self.rating}/5)"
@@ -0,0 +1,169 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        # Full precision; DjangoJSONEncoder would drop microseconds
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPage:
+    """One page of a ``KeysetPaginator``; iterates like a list of objects"""
+
+    def __init__(self, paginator, object_list, has_next, has_previous):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def next_cursor(self):
+        if not self.has_next or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], 'next')
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], 'previous')
+
+    @cached_property
+    def _estimate(self):
+        return self.paginator.estimate_count()
+
+    @property
+    def estimated_count(self):
+        return self._estimate[0]
+
+    @property
+    def count_is_exact(self):
+        return self._estimate[1]
+
+
+class KeysetPaginator:
+    """Cursor pagination that seeks past the last row instead of using OFFSET
+
+    ``ordering`` defaults to the queryset's ordering and always gets the
+    primary key appended as a tiebreaker, so every row has a unique
+    position. Cursors are opaque tokens carrying the sort key of the row
+    the page starts after (or before), and page N costs the same as page 1.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None, count_limit=1000):
+        ordering = list(ordering or queryset.query.order_by) or ['-pk']
+        if ordering[-1].lstrip('-') not in ('pk', 'id'):
+            ordering.append('-pk' if ordering[-1].startswith('-') else 'pk')
+        self.queryset = queryset.order_by(*ordering)
+        self.per_page = per_page
+        self.keys = [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+        self.count_limit = count_limit
+
+    @property
+    def signature(self):
+        return ','.join(('-' if desc else '') + field for field, desc in self.keys)
+
+    def encode_cursor(self, obj, direction):
+        payload = {
+            'o': self.signature,
+            'd': direction,
+            'v': [_encode_value(getattr(obj, field)) for field, _ in self.keys],
+        }
+        data = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            payload = json.loads(data)
+            direction, values = payload['d'], payload['v']
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise InvalidCursor('Malformed cursor.')
+        if payload.get('o') != self.signature or direction not in ('next', 'previous'):
+            raise InvalidCursor('Cursor does not match this listing.')
+        if len(values) != len(self.keys):
+            raise InvalidCursor('Malformed cursor.')
+        return direction, values
+
+    def _seek(self, values, backwards):
+        """Rows strictly after (or before) the row with the given sort key"""
+        condition = Q()
+        for i, (field, desc) in enumerate(self.keys):
+            lookup = 'lt' if desc != backwards else 'gt'
+            step = Q(**{f'{field}__{lookup}': values[i]})
+            for prior_field, prior_value in zip([key for key, _ in self.keys[:i]], values):
+                step &= Q(**{prior_field: prior_value})
+            condition |= step
+        return condition
+
+    def _page_queryset(self, cursor):
+        """The rows to fetch for the page after/before ``cursor`` and its direction"""
+        if not cursor:
+            return self.queryset[:self.per_page + 1], None
+        direction, values = self.decode_cursor(cursor)
+        backwards = direction == 'previous'
+        queryset = self.queryset.filter(self._seek(values, backwards))
+        if backwards:
+            queryset = queryset.reverse()
+        return queryset[:self.per_page + 1], direction
+
+    def _build_page(self, rows, direction):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction is None:
+            return KeysetPage(self, rows, has_more, False)
+        if direction == 'previous':
+            rows.reverse()
+            return KeysetPage(self, rows, True, has_more)
+        return KeysetPage(self, rows, has_more, True)
+
+    def page(self, cursor=None):
+        """Return the page after/before ``cursor``, or the first page; raises ``InvalidCursor``"""
+        queryset, direction = self._page_queryset(cursor)
+        return self._build_page(list(queryset), direction)
+
+    async def apage(self, cursor=None):
+        """Async version of ``page`` for async views"""
+        queryset, direction = self._page_queryset(cursor)
+        return self._build_page([obj async for obj in queryset], direction)
+
+    def get_page(self, cursor=None):
+        """Like ``page`` but falls back to the first page on a bad cursor"""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+    async def aget_page(self, cursor=None):
+        try:
+            return await self.apage(cursor)
+        except InvalidCursor:
+            return await self.apage()
+
+    def estimate_count(self):
+        """Row count capped at ``count_limit``, as ``(count, is_exact)``"""
+        count = self.queryset.order_by()[:self.count_limit + 1].count()
+        return min(count, self.count_limit), count <= self.count_limit
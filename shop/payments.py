@@ -0,0 +1,176 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Order, PaymentEvent
+
+logger = logging.getLogger(__name__)
+
+# LiqPay status -> (order statuses it applies to, new order status)
+TRANSITIONS = {
+    'success': ({'pending'}, 'processing'),
+    # What a paid order reports with sandbox keys
+    'sandbox': ({'pending'}, 'processing'),
+    'reversed': ({'pending', 'processing'}, 'cancelled'),
+}
+
+_worker_lock = threading.Lock()
+_worker = None
+
+
+def sign(data, private_key):
+    """LiqPay's signature: base64 of the SHA-1 of ``private_key + data + private_key``"""
+    return base64.b64encode(hashlib.sha1((private_key + data + private_key).encode()).digest()).decode()
+
+
+def verify_callback(data, signature):
+    """The decoded payload of a LiqPay callback, or None if it is not signed
+    with our private key"""
+    private_key = settings.LIQPAY_PRIVATE_KEY
+    if not (data and signature and private_key):
+        return None
+    if not hmac.compare_digest(sign(data, private_key).encode(), signature.encode()):
+        return None
+    try:
+        payload = json.loads(base64.b64decode(data))
+    except ValueError:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def build_event(payload, data):
+    # Older API versions leave out transaction_id; a digest of the signed data
+    # still collapses retries of the same callback
+    transaction_id = payload.get('transaction_id') or payload.get('payment_id') or hashlib.sha1(data.encode()).hexdigest()
+    return PaymentEvent(
+        provider='liqpay',
+        transaction_id=str(transaction_id)[:64],
+        status=str(payload.get('status', ''))[:30],
+        order_ref=str(payload.get('order_id', ''))[:64],
+        payload=payload,
+    )
+
+
+async def arecord_event(payload, data):
+    """Store a verified callback; a retry of one already stored is a no-op"""
+    await PaymentEvent.objects.abulk_create([build_event(payload, data)], ignore_conflicts=True)
+
+
+def _order_id(ref):
+    # isdecimal() alone accepts non-ASCII digits, and longer numbers overflow
+    # a 64-bit primary key
+    return int(ref) if ref.isascii() and ref.isdecimal() and len(ref) <= 18 else None
+
+
+def _transition(event, order):
+    if order is None:
+        return 'unknown_order'
+    sources, target = TRANSITIONS.get(event.status, ((), None))
+    if order.status not in sources:
+        return 'ignored'
+    order.status = target
+    return 'applied'
+
+
+def _apply_batch(batch_size):
+    with transaction.atomic():
+        # skip_locked lets several workers share the queue on PostgreSQL; on
+        # SQLite both profiles open IMMEDIATE transactions, which serialize them
+        events = list(
+            PaymentEvent.objects.filter(processed_at=None).order_by('id')
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if not events:
+            return 0, 0
+        orders = Order.objects.in_bulk({_order_id(event.order_ref) for event in events} - {None})
+
+        now = timezone.now()
+        changed = {}
+        for event in events:
+            event.order = orders.get(_order_id(event.order_ref))
+            event.outcome = _transition(event, event.order)
+            event.processed_at = now
+            if event.outcome == 'applied':
+                event.order.updated_at = now
+                changed[event.order.pk] = event.order
+
+        if changed:
+            Order.objects.bulk_update(changed.values(), ['status', 'updated_at'])
+        PaymentEvent.objects.bulk_update(events, ['order', 'processed_at', 'outcome'])
+    return len(events), len(changed)
+
+
+def process_events(batch_size=100, limit=None):
+    """Apply pending payment events to their orders, oldest first
+
+    Each batch loads its orders with one query and is saved in one short
+    transaction. ``limit`` caps the events handled in one run. Returns a dict
+    of throughput metrics, which is also logged when there was work.
+    """
+    started = time.perf_counter()
+    events = orders = batches = 0
+    while limit is None or events < limit:
+        size = batch_size if limit is None else min(batch_size, limit - events)
+        handled, changed = _apply_batch(size)
+        events += handled
+        orders += changed
+        batches += bool(handled)
+        if handled < size:
+            break
+
+    seconds = time.perf_counter() - started
+    stats = {
+        'events': events,
+        'orders': orders,
+        'batches': batches,
+        'seconds': round(seconds, 3),
+        'events_per_second': round(events / seconds, 1) if seconds else 0.0,
+    }
+    if events:
+        logger.info(
+            'Processed %(events)d payment events for %(orders)d orders in %(batches)d batches '
+            '(%(seconds).3fs, %(events_per_second).1f events/s)', stats,
+        )
+    return stats
+
+
+def run_forever(interval, stop, batch_size=100):
+    """Drain the queue, then wait ``interval`` seconds, until ``stop`` is set"""
+    while True:
+        try:
+            process_events(batch_size=batch_size)
+        except Exception:
+            logger.exception('Payment event worker run failed')
+        finally:
+            close_old_connections()
+        if stop.wait(interval):
+            break
+
+
+def start_worker(interval=None):
+    """Run ``process_events`` every ``interval`` seconds in a daemon thread
+
+    For deployments without a separate ``process_payments --loop`` process;
+    gunicorn.conf.py starts it in one web worker.
+    ``interval`` defaults to ``SHOP_PAYMENT_WORKER_INTERVAL``; nothing is
+    started when it is 0. Returns the thread's stop event, or None.
+    """
+    global _worker
+    interval = settings.SHOP_PAYMENT_WORKER_INTERVAL if interval is None else interval
+    if interval <= 0:
+        return None
+    with _worker_lock:
+        if _worker is None:
+            stop = threading.Event()
+            thread = threading.Thread(target=run_forever, args=(interval, stop), name='payment-worker', daemon=True)
+            thread.start()
+            _worker = stop
+    return _worker
@@ -0,0 +1,73 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import Product, Review
+
+RATINGS = range(1, 6)
+
+
+def rating_updates(new_rating=None, old_rating=None):
+    """F-expression updates moving a product's aggregates from ``old_rating`` to ``new_rating``"""
+    updates = {}
+    sum_delta = (new_rating or 0) - (old_rating or 0)
+    count_delta = (new_rating is not None) - (old_rating is not None)
+    if sum_delta:
+        updates['rating_sum'] = F('rating_sum') + sum_delta
+    if count_delta:
+        updates['rating_count'] = F('rating_count') + count_delta
+    if new_rating != old_rating:
+        if old_rating is not None:
+            updates[f'rating_count_{old_rating}'] = F(f'rating_count_{old_rating}') - 1
+        if new_rating is not None:
+            updates[f'rating_count_{new_rating}'] = F(f'rating_count_{new_rating}') + 1
+    return updates
+
+
+def record_rating(product_id, new_rating=None, old_rating=None):
+    """Apply a created (old is None), edited or deleted (new is None) review to the aggregates"""
+    updates = rating_updates(new_rating, old_rating)
+    if updates:
+        Product.objects.filter(pk=product_id).update(**updates)
+
+
+def rebuild_ratings(batch_size=1000):
+    """Recompute every product's aggregates from the reviews table
+
+    Only products whose stored aggregates were wrong are written, so a
+    rebuild does not bump ``updated_at`` (and with it API validators and the
+    changes feed) on products nothing changed for. Returns products updated.
+    """
+    aggregates = {
+        'rating_sum': Sum('rating'),
+        'rating_count': Count('id'),
+    }
+    for rating in RATINGS:
+        aggregates[f'rating_count_{rating}'] = Count('id', filter=Q(rating=rating))
+    fields = list(aggregates)
+
+    updated = 0
+    products = Product.objects.order_by('pk').values_list('pk', *fields)
+    last_id = 0
+    while True:
+        batch = list(products.filter(pk__gt=last_id)[:batch_size])
+        if not batch:
+            return updated
+        last_id = batch[-1][0]
+        rows = {
+            row.pop('product'): row
+            for row in Review.objects.filter(product__in=[pk for pk, *_ in batch])
+            .values('product').order_by('product').annotate(**aggregates)
+        }
+        changed = []
+        for pk, *stored in batch:
+            row = rows.get(pk, {})
+            actual = [row.get(field) or 0 for field in fields]
+            if actual != stored:
+                product = Product(pk=pk)
+                for field, value in zip(fields, actual):
+                    setattr(product, field, value)
+                changed.append(product)
+        if changed:
+            with transaction.atomic():
+                Product.objects.bulk_update(changed, fields)
+        updated += len(changed)
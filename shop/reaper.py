@@ -0,0 +1,99 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Cart, CartItem
+
+logger = logging.getLogger(__name__)
+
+_scheduler_lock = threading.Lock()
+_scheduler = None
+
+
+def _delete_in_batches(queryset, batch_size, limit=None):
+    """Delete rows of ``queryset`` by primary key, ``batch_size`` at a time
+
+    Each batch is its own short transaction so the cart tables are never
+    locked for long. Returns ``(rows, batches)`` for the rows of
+    ``queryset``'s model; cascaded rows are not counted.
+    """
+    rows = batches = 0
+    while limit is None or rows < limit:
+        size = batch_size if limit is None else min(batch_size, limit - rows)
+        with transaction.atomic():
+            ids = list(queryset.values_list('pk', flat=True)[:size])
+            if not ids:
+                break
+            queryset.model.objects.filter(pk__in=ids).delete()
+        rows += len(ids)
+        batches += 1
+        if len(ids) < size:
+            break
+    return rows, batches
+
+
+def reap_carts(max_age=None, batch_size=500, limit=None):
+    """Delete abandoned guest carts and cart lines for deactivated products
+
+    Guest carts whose ``updated_at`` is older than ``max_age`` (a timedelta,
+    ``SHOP_GUEST_CART_TTL_DAYS`` by default) are removed together with their
+    lines. ``limit`` caps the carts deleted in one run. Returns a dict of
+    throughput metrics, which is also logged.
+    """
+    if max_age is None:
+        max_age = timedelta(days=settings.SHOP_GUEST_CART_TTL_DAYS)
+    started = time.perf_counter()
+
+    # Matches the (user, updated_at) index
+    expired = Cart.objects.filter(user=None, updated_at__lt=timezone.now() - max_age).order_by('updated_at')
+    carts, cart_batches = _delete_in_batches(expired, batch_size, limit)
+    inactive = CartItem.objects.filter(product__is_active=False)
+    items, item_batches = _delete_in_batches(inactive, batch_size)
+
+    seconds = time.perf_counter() - started
+    stats = {
+        'carts': carts,
+        'items': items,
+        'batches': cart_batches + item_batches,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round((carts + items) / seconds, 1) if seconds else 0.0,
+    }
+    logger.info(
+        'Reaped %(carts)d guest carts and %(items)d inactive cart items in %(batches)d batches '
+        '(%(seconds).3fs, %(rows_per_second).1f rows/s)', stats,
+    )
+    return stats
+
+
+def _run_forever(interval, stop):
+    while not stop.wait(interval):
+        try:
+            reap_carts()
+        except Exception:
+            logger.exception('Cart reaper run failed')
+        finally:
+            close_old_connections()
+
+
+def start_scheduler(interval=None):
+    """Run ``reap_carts`` every ``interval`` seconds in a daemon thread
+
+    ``interval`` defaults to ``SHOP_CART_REAPER_INTERVAL``; nothing is started
+    when it is 0. Returns the thread's stop event, or None.
+    """
+    global _scheduler
+    interval = settings.SHOP_CART_REAPER_INTERVAL if interval is None else interval
+    if interval <= 0:
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            stop = threading.Event()
+            thread = threading.Thread(target=_run_forever, args=(interval, stop), name='cart-reaper', daemon=True)
+            thread.start()
+            _scheduler = stop
+    return _scheduler
@@ -0,0 +1,128 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+SEARCH_FIELDS = ('title', 'description')
+
+# Words are runs of letters/digits; apostrophes stay inside Ukrainian words (м'ясо)
+TOKEN_RE = re.compile(r"\w+(?:['’]\w+)*")
+
+
+def tokenize(query):
+    """Split a user query into search terms"""
+    return TOKEN_RE.findall(query or '')
+
+
+class SearchBackend:
+    """Base class for product search backends"""
+
+    def search(self, queryset, query, fields=SEARCH_FIELDS):
+        """Filter ``queryset`` by ``query`` and annotate it with ``search_rank``"""
+        raise NotImplementedError
+
+    def update(self, product):
+        """Add or refresh a product in the index"""
+
+    def update_many(self, products):
+        """Add or refresh several products, e.g. after a bulk write"""
+        for product in products:
+            self.update(product)
+
+    def remove(self, product_id):
+        """Drop a product from the index"""
+
+    def rebuild(self):
+        """Reindex the whole catalog"""
+
+
+class ContainsSearchBackend(SearchBackend):
+    """Unindexed fallback that matches the query with ``icontains``"""
+
+    def search(self, queryset, query, fields=SEARCH_FIELDS):
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+
+class SQLiteFTSSearchBackend(SearchBackend):
+    """SQLite FTS5 index with bm25 ranking and prefix matching"""
+
+    table = 'shop_product_fts'
+    # Title hits weigh more than description hits
+    weights = {'title': 10.0, 'description': 1.0}
+
+    def build_match(self, query, fields=SEARCH_FIELDS):
+        """Turn a user query into an FTS5 MATCH expression of prefix terms"""
+        terms = ' '.join(f'"{term}"*' for term in tokenize(query))
+        if not terms:
+            return ''
+        if tuple(fields) != SEARCH_FIELDS:
+            return '{%s} : (%s)' % (' '.join(fields), terms)
+        return terms
+
+    def search(self, queryset, query, fields=SEARCH_FIELDS):
+        match = self.build_match(query, fields)
+        if not match:
+            return queryset.none()
+        table = self.table
+        weights = ', '.join(str(self.weights[field]) for field in SEARCH_FIELDS)
+        base_table = queryset.model._meta.db_table
+        # Join the index rather than ranking with a correlated subquery, which
+        # re-ran the MATCH for every matching row
+        return queryset.extra(
+            tables=[table],
+            where=[f'{table} MATCH %s', f'{table}.rowid = "{base_table}"."id"'],
+            params=[match],
+        ).annotate(
+            search_rank=RawSQL(f'bm25({table}, {weights})', (), output_field=FloatField()),
+        )
+
+    def update(self, product):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [product.pk])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, description) VALUES (%s, %s, %s)',
+                [product.pk, product.title, product.description],
+            )
+
+    def update_many(self, products):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [[product.pk] for product in products])
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, title, description) VALUES (%s, %s, %s)',
+                [[product.pk, product.title, product.description] for product in products],
+            )
+
+    def remove(self, product_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [product_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, description) '
+                f'SELECT id, title, description FROM shop_product'
+            )
+
+
+def get_backend():
+    """Return the configured search backend, defaulting to FTS5 on SQLite"""
+    path = getattr(settings, 'SHOP_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTSSearchBackend()
+    return ContainsSearchBackend()
+
+
+def search_products(queryset, query, fields=SEARCH_FIELDS):
+    """Filter a product queryset by a search query, annotated with ``search_rank`` (lower is better)"""
+    return get_backend().search(queryset, query, fields)
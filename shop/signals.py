@@ -0,0 +1,114 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from . import cache, thumbnails
+from .cart import cart_scopes
+from .models import Cart, CartItem, Category, Product, ProductImage, ProductTombstone, Review
+from .ratings import record_rating
+from .search import get_backend
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    """Keep the search index in sync with product edits"""
+    get_backend().update(instance)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    """Drop deleted products from the search index"""
+    get_backend().remove(instance.pk)
+
+
+@receiver(post_delete, sender=Product)
+def record_product_deletion(sender, instance, **kwargs):
+    """Leave a tombstone so the changes feed can report the deletion"""
+    ProductTombstone.objects.create(product_id=instance.pk)
+
+
+@receiver(post_init, sender=Review)
+def remember_recorded_rating(sender, instance, **kwargs):
+    """Remember the (product, rating) the aggregates count for a stored review"""
+    loaded = instance.__dict__
+    if instance.pk is not None and 'rating' in loaded and 'product_id' in loaded:
+        instance._recorded_rating = (loaded['product_id'], loaded['rating'])
+    else:
+        instance._recorded_rating = (None, None)
+
+
+@receiver(post_save, sender=Review)
+def record_review(sender, instance, created, **kwargs):
+    """Move the rating aggregates for reviews created or edited anywhere"""
+    old_product_id, old_rating = (None, None) if created else instance._recorded_rating
+    if old_product_id in (None, instance.product_id):
+        record_rating(instance.product_id, new_rating=instance.rating, old_rating=old_rating)
+    else:
+        record_rating(old_product_id, old_rating=old_rating)
+        record_rating(instance.product_id, new_rating=instance.rating)
+    instance._recorded_rating = (instance.product_id, instance.rating)
+
+
+@receiver(post_delete, sender=Review)
+def unrecord_review(sender, instance, **kwargs):
+    """Take deleted reviews out of the product's rating aggregates"""
+    product_id, rating = instance._recorded_rating
+    if product_id is None:
+        product_id, rating = instance.product_id, instance.rating
+    record_rating(product_id, old_rating=rating)
+
+
+@receiver(post_init, sender=Product)
+def remember_cached_state(sender, instance, **kwargs):
+    """Remember what the product looked like when loaded, for invalidation"""
+    # Read __dict__ directly; deferred fields would trigger a query per instance
+    instance._cached_state = (instance.__dict__.get('category_id'), instance.__dict__.get('featured', False))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_pages(sender, instance, **kwargs):
+    old_category_id, was_featured = instance._cached_state
+    cache.invalidate(*cache.product_scopes(
+        instance.pk, old_category_id, instance.category_id, featured=was_featured or instance.featured,
+    ))
+    instance._cached_state = (instance.category_id, instance.featured)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_pages(sender, instance, **kwargs):
+    cache.invalidate('catalog', 'categories', f'category:{instance.pk}')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_pages(sender, instance, **kwargs):
+    cache.invalidate(f'product:{instance.product_id}')
+
+
+@receiver(post_save, sender=Cart)
+@receiver(post_delete, sender=Cart)
+def invalidate_cart_summary(sender, instance, **kwargs):
+    cache.invalidate(*cart_scopes(instance.pk, instance.user_id))
+
+
+@receiver(post_save, sender=CartItem)
+@receiver(post_delete, sender=CartItem)
+def invalidate_cart_line_summary(sender, instance, **kwargs):
+    cache.invalidate(*cart_scopes(instance.cart_id))
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=ProductImage)
+@receiver(pre_save, sender=Category)
+def note_image_upload(sender, instance, **kwargs):
+    instance._image_uploaded = bool(instance.image) and not instance.image._committed
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=Category)
+def make_thumbnails(sender, instance, **kwargs):
+    """Generate variants of uploaded images now rather than on the first page view"""
+    if getattr(instance, '_image_uploaded', False):
+        thumbnails.warm(instance.image)
@@ -0,0 +1,86 @@
+import base64
+import binascii
+import json
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import catalog
+from .models import Product, ProductTombstone
+from .pagination import InvalidCursor, KeysetPaginator
+
+
+def settle_delay():
+    # A transaction stamps updated_at before it commits, so rows newer than
+    # this may still be joined by slower writers with earlier timestamps
+    return timedelta(seconds=getattr(settings, 'SHOP_SYNC_SETTLE_SECONDS', 2))
+
+
+class ChangeSet:
+    """One batch of the changes feed"""
+
+    def __init__(self, products, deleted, cursor, has_more):
+        self.products = products
+        self.deleted = deleted
+        self.cursor = cursor
+        self.has_more = has_more
+
+
+def _encode(positions):
+    data = json.dumps(positions, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def _decode(cursor):
+    try:
+        positions = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor('Malformed cursor.')
+    if not isinstance(positions, dict) or set(positions) != {'products', 'deleted'}:
+        raise InvalidCursor('Malformed cursor.')
+    return positions
+
+
+def product_changes(cursor=None, since=None, limit=100):
+    """Products changed and deleted after ``cursor`` (or the datetime ``since``)
+
+    Changed products, including deactivated ones, come in ``(updated_at,
+    id)`` order and deletions in ``(deleted_at, id)`` order, each as a
+    keyset stream of at most ``limit`` rows per batch. The returned cursor
+    holds the position in both streams and is always set once anything
+    has been seen, so clients keep polling with the last one they got.
+    Raises ``InvalidCursor``.
+    """
+    horizon = timezone.now() - settle_delay()
+    products = KeysetPaginator(
+        catalog.with_listing_data(Product.objects.filter(updated_at__lte=horizon)), limit, ordering=['updated_at'],
+    )
+    tombstones = KeysetPaginator(
+        ProductTombstone.objects.filter(deleted_at__lte=horizon), limit, ordering=['deleted_at'],
+    )
+
+    if cursor:
+        positions = _decode(cursor)
+    elif since:
+        positions = {
+            'products': products.encode_cursor(SimpleNamespace(updated_at=since, pk=0), 'next'),
+            'deleted': tombstones.encode_cursor(SimpleNamespace(deleted_at=since, pk=0), 'next'),
+        }
+    else:
+        positions = {'products': None, 'deleted': None}
+
+    product_page = products.page(positions['products'])
+    tombstone_page = tombstones.page(positions['deleted'])
+    if product_page.object_list:
+        positions['products'] = products.encode_cursor(product_page.object_list[-1], 'next')
+    if tombstone_page.object_list:
+        positions['deleted'] = tombstones.encode_cursor(tombstone_page.object_list[-1], 'next')
+
+    return ChangeSet(
+        products=product_page.object_list,
+        deleted=[tombstone.product_id for tombstone in tombstone_page],
+        cursor=_encode(positions),
+        has_more=product_page.has_next or tombstone_page.has_next,
+    )
@@ -0,0 +1,245 @@
+import random
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import (
+    Cart, CartItem, Category, Order, OrderItem, PaymentEvent, Product, ProductImage, ProductTombstone, Review,
+    Wishlist,
+)
+from .search import get_backend
+
+USERNAME_PREFIX = 'seed-user-'
+PLACEHOLDER_DIR = 'products/placeholders'
+# Fixed so the same seed always produces the same timestamps
+BASE_DATE = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+CATEGORY_NAMES = [
+    'Електроніка', 'Книги', 'Дім та кухня', 'Спорт', 'Іграшки', 'Одяг', 'Краса', 'Сад', 'Авто', 'Зоотовари',
+]
+ADJECTIVES = [
+    'Compact', 'Classic', 'Smart', 'Wireless', 'Premium', 'Eco', 'Portable', 'Deluxe', 'Ultra', 'Vintage',
+    'Modern', 'Rugged', 'Silent', 'Turbo', 'Mini', 'Family', 'Travel', 'Pro', 'Handmade', 'Organic',
+]
+NOUNS = [
+    'Blender', 'Headphones', 'Novel', 'Cookbook', 'Lamp', 'Backpack', 'Kettle', 'Camera', 'Jacket', 'Mug',
+    'Speaker', 'Drone', 'Puzzle', 'Sneakers', 'Watch', 'Tent', 'Notebook', 'Keyboard', 'Pan', 'Bicycle',
+]
+RATING_WEIGHTS = [5, 7, 15, 33, 40]
+
+
+def placeholder_images(count, rng, size=(600, 400)):
+    """Paths of ``count`` generated placeholder images under MEDIA_ROOT, drawing missing ones"""
+    from PIL import Image, ImageDraw
+
+    directory = Path(settings.MEDIA_ROOT) / PLACEHOLDER_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        color = tuple(rng.randrange(60, 220) for _ in range(3))
+        name = f'placeholder-{i:03d}.jpg'
+        target = directory / name
+        if not target.exists():
+            image = Image.new('RGB', size, color)
+            draw = ImageDraw.Draw(image)
+            draw.rectangle([20, 20, size[0] - 20, size[1] - 20], outline=(255, 255, 255), width=4)
+            draw.text((40, 40), f'#{i}', fill=(255, 255, 255))
+            image.save(target, 'JPEG', quality=80)
+        paths.append(f'{PLACEHOLDER_DIR}/{name}')
+    return paths
+
+
+class SyntheticCatalog:
+    """Deterministic generator of shop data at load-test scale
+
+    Everything is written with ``bulk_create`` in batches of ``batch_size``,
+    one transaction per batch, and only ids and prices are kept in memory,
+    so a million products need no more than a few tens of megabytes.
+    Bulk inserts skip model signals, so rating aggregates are computed
+    while generating and the search index is rebuilt at the end.
+    """
+
+    def __init__(self, seed=42, batch_size=2000, images=24, log=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.image_count = images
+        self.log = log or (lambda message: None)
+        self.category_ids = []
+        self.user_ids = []
+        self.product_ids = array('q')
+        self.product_cents = array('q')
+
+    def _date(self, days=365):
+        return BASE_DATE - timedelta(seconds=self.rng.randrange(days * 86400))
+
+    def _batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(self.batch_size, total - start)
+
+    def flush(self):
+        """Delete all shop data and previously generated users"""
+        with transaction.atomic():
+            # Raw deletes: the ORM would fetch every row and fire signals for each
+            for model in (PaymentEvent, OrderItem, Order, CartItem, Cart, Review, Wishlist.products.through,
+                          Wishlist, ProductImage, ProductTombstone, Product, Category):
+                model.objects.all()._raw_delete(model.objects.db)
+            generated = User.objects.filter(username__startswith=USERNAME_PREFIX)
+            generated._raw_delete(generated.db)
+        self.log('Deleted existing data.')
+
+    def categories(self, count):
+        objects = [
+            Category(
+                title=CATEGORY_NAMES[i] if i < len(CATEGORY_NAMES) else f'Category {i + 1}',
+                description=f'Synthetic category {i + 1}',
+                created_at=self._date(),
+            )
+            for i in range(count)
+        ]
+        self.category_ids = [category.pk for category in Category.objects.bulk_create(objects)]
+        self.log(f'Created {count} categories.')
+
+    def users(self, count):
+        password = make_password('password')
+        offset = User.objects.filter(username__startswith=USERNAME_PREFIX).count()
+        for start, size in self._batches(count):
+            objects = [
+                User(
+                    username=f'{USERNAME_PREFIX}{offset + start + i:07d}',
+                    email=f'{USERNAME_PREFIX}{offset + start + i:07d}@example.com',
+                    password=password,
+                    date_joined=self._date(),
+                )
+                for i in range(size)
+            ]
+            with transaction.atomic():
+                self.user_ids.extend(user.pk for user in User.objects.bulk_create(objects))
+        self.log(f'Created {count} users.')
+
+    def _product(self, images, ratings):
+        rng = self.rng
+        cents = rng.randrange(500, 500000)
+        price = Decimal(cents) / 100
+        discount = None
+        if rng.random() < 0.2:
+            discount = (price * Decimal(rng.randrange(70, 96)) / 100).quantize(Decimal('0.01'))
+        title = f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {rng.randrange(1, 1000)}'
+        product = Product(
+            title=title,
+            description=f'{title}: ' + ' '.join(rng.choices(ADJECTIVES + NOUNS, k=12)).lower() + '.',
+            price=price,
+            discount_price=discount,
+            stock_quantity=0 if rng.random() < 0.05 else rng.randrange(1, 200),
+            image=rng.choice(images),
+            category_id=rng.choice(self.category_ids),
+            is_active=rng.random() > 0.03,
+            featured=rng.random() < 0.02,
+            created_at=self._date(),
+            rating_sum=sum(ratings),
+            rating_count=len(ratings),
+        )
+        for rating in ratings:
+            setattr(product, f'rating_count_{rating}', getattr(product, f'rating_count_{rating}') + 1)
+        return product
+
+    def products(self, count, reviews_per_product=3):
+        rng = self.rng
+        images = placeholder_images(self.image_count, rng)
+        max_reviews = min(reviews_per_product * 2, len(self.user_ids))
+        reviews_total = 0
+        for start, size in self._batches(count):
+            ratings = [rng.choices(range(1, 6), RATING_WEIGHTS, k=rng.randint(0, max_reviews)) for _ in range(size)]
+            products = [self._product(images, product_ratings) for product_ratings in ratings]
+            with transaction.atomic():
+                Product.objects.bulk_create(products)
+                reviews = [
+                    Review(product_id=product.pk, user_id=user_id, rating=rating,
+                           comment='Synthetic review.', created_at=self._date())
+                    for product, product_ratings in zip(products, ratings)
+                    for user_id, rating in zip(rng.sample(self.user_ids, len(product_ratings)), product_ratings)
+                ]
+                Review.objects.bulk_create(reviews, batch_size=self.batch_size)
+            reviews_total += len(reviews)
+            for product in products:
+                if product.is_active:
+                    self.product_ids.append(product.pk)
+                    self.product_cents.append(int(product.effective_price * 100))
+        self.log(f'Created {count} products with {reviews_total} reviews.')
+
+    def _lines(self, max_lines):
+        """Random distinct active products as ``(product_id, price, quantity)``"""
+        picks = {self.rng.randrange(len(self.product_ids)) for _ in range(self.rng.randint(1, max_lines))}
+        return [
+            (self.product_ids[i], Decimal(self.product_cents[i]) / 100, self.rng.randint(1, 3))
+            for i in sorted(picks)
+        ]
+
+    def carts(self, count):
+        # The shop expects at most one cart per user; the rest are guest carts
+        owners = self.rng.sample(self.user_ids, min(count // 2, len(self.user_ids)))
+        for start, size in self._batches(count):
+            carts = [
+                Cart(user_id=owners[start + i] if start + i < len(owners) else None, created_at=self._date(30))
+                for i in range(size)
+            ]
+            with transaction.atomic():
+                Cart.objects.bulk_create(carts)
+                # auto_now stamped every cart with the current time; untouched
+                # since creation makes the older guest carts reapable
+                Cart.objects.filter(pk__in=[cart.pk for cart in carts]).update(updated_at=F('created_at'))
+                CartItem.objects.bulk_create([
+                    CartItem(cart_id=cart.pk, product_id=product_id, quantity=quantity)
+                    for cart in carts
+                    for product_id, _, quantity in self._lines(5)
+                ], batch_size=self.batch_size)
+        self.log(f'Created {count} carts.')
+
+    def orders(self, count):
+        statuses = [status for status, _ in Order.STATUS_CHOICES]
+        offset = Order.objects.count()
+        for start, size in self._batches(count):
+            orders, lines = [], []
+            for i in range(size):
+                order_lines = self._lines(4)
+                lines.append(order_lines)
+                orders.append(Order(
+                    user_id=self.rng.choice(self.user_ids),
+                    order_number=f'S{offset + start + i:011d}',
+                    status=self.rng.choice(statuses),
+                    total_amount=sum(price * quantity for _, price, quantity in order_lines),
+                    shipping_address='вул. Хрещатик, 1, Київ',
+                    billing_address='вул. Хрещатик, 1, Київ',
+                    phone='+380000000000',
+                    email='buyer@example.com',
+                    created_at=self._date(),
+                ))
+            with transaction.atomic():
+                Order.objects.bulk_create(orders)
+                OrderItem.objects.bulk_create([
+                    OrderItem(order_id=order.pk, product_id=product_id, quantity=quantity, price=price,
+                              created_at=order.created_at)
+                    for order, order_lines in zip(orders, lines)
+                    for product_id, price, quantity in order_lines
+                ], batch_size=self.batch_size)
+        self.log(f'Created {count} orders.')
+
+    def generate(self, categories=10, users=100, products=1000, reviews_per_product=3, carts=100, orders=200):
+        """Create a whole catalog; users are needed for reviews, carts and orders"""
+        self.categories(categories)
+        self.users(users)
+        self.products(products, reviews_per_product)
+        if self.product_ids:
+            self.carts(carts)
+            if self.user_ids:
+                self.orders(orders)
+        get_backend().rebuild()
+        cache.clear()
+        self.log('Rebuilt the search index and cleared the cache.')
@@ -0,0 +1,53 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from shop.thumbnails import DEFAULT_WIDTHS, srcset, variants, variants_many
+
+register = template.Library()
+
+
+def _widths(widths):
+    return tuple(int(width) for width in widths.split()) if widths else DEFAULT_WIDTHS
+
+
+@register.simple_tag(takes_context=True)
+def prefetch_thumbnails(context, objects, field='image', widths=None):
+    """Look up the variants of a list's images in one cache round trip
+
+    ``{% prefetch_thumbnails page_obj %}`` or ``{% prefetch_thumbnails cart_items "product.image" %}``
+    before the loop; ``responsive_image`` tags with the same widths later in
+    the template reuse the results.
+    """
+    fieldfiles = []
+    for obj in objects:
+        for attr in field.split('.'):
+            obj = getattr(obj, attr, None)
+        fieldfiles.append(obj)
+    widths = _widths(widths)
+    context.render_context.setdefault(('thumbnails', widths), {}).update(variants_many(fieldfiles, widths))
+    return ''
+
+
+@register.simple_tag(takes_context=True)
+def responsive_image(context, image, alt='', sizes='100vw', widths=None, loading='lazy', **attrs):
+    """A ``<picture>`` with WebP and JPEG srcsets for an image field
+
+    ``{% responsive_image product.image alt=product.title sizes="(min-width: 992px) 25vw, 50vw" class="card-img-top" %}``
+    Extra keyword arguments become attributes of the ``<img>``. Falls back to
+    a plain ``<img>`` of the original when no variants can be made.
+    """
+    if not image:
+        return ''
+    widths = _widths(widths)
+    extra = format_html_join('', ' {}="{}"', sorted(attrs.items()))
+    prefetched = context.render_context.get(('thumbnails', widths), {})
+    found = prefetched[image.name] if image.name in prefetched else variants(image, widths)
+    if not found:
+        return format_html('<img src="{}" alt="{}" loading="{}"{}>', image.url, alt, loading, extra)
+    jpeg = found['image/jpeg']
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="{}" decoding="async"{}></picture>',
+        srcset(found['image/webp']), sizes,
+        jpeg[len(jpeg) // 2][0], srcset(jpeg), sizes, alt, loading, extra,
+    )
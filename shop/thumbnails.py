@@ -0,0 +1,116 @@
+import hashlib
+import io
+import logging
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Bump to regenerate every variant after changing sizes or encoder settings
+VERSION = 1
+DEFAULT_WIDTHS = (240, 480, 960)
+FORMATS = (
+    # (format, extension, mime type, save options)
+    ('WEBP', 'webp', 'image/webp', {'quality': 75, 'method': 4}),
+    ('JPEG', 'jpg', 'image/jpeg', {'quality': 80, 'optimize': True, 'progressive': True}),
+)
+DIRECTORY = 'thumbs'
+FAILURE_TIMEOUT = 300
+
+
+def variant_name(digest, width, extension):
+    return f'{DIRECTORY}/{digest[:2]}/{digest}-{width}.{extension}'
+
+
+def _encode(image, width, fmt, options):
+    if width < image.width:
+        image = image.resize((width, round(image.height * width / image.width)), resample=Image.Resampling.LANCZOS)
+    if fmt == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def generate(name, widths=DEFAULT_WIDTHS, storage=default_storage):
+    """Write the missing WebP and JPEG variants of a stored image
+
+    Variants are named after a digest of the source bytes, so they can be
+    served as immutable, a replaced source never reuses old files and
+    identical uploads share theirs. Widths larger than the source collapse into
+    one full-width variant. Returns ``{mime type: [(url, width), ...]}``.
+    """
+    with storage.open(name, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data + f':{VERSION}'.encode()).hexdigest()[:20]
+
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+        sizes = sorted({min(width, image.width) for width in widths})
+
+        variants = {}
+        for fmt, extension, mime, options in FORMATS:
+            variants[mime] = []
+            for width in sizes:
+                target = variant_name(digest, width, extension)
+                if not storage.exists(target):
+                    storage.save(target, ContentFile(_encode(image, width, fmt, options)))
+                variants[mime].append((storage.url(target), width))
+    return variants
+
+
+def _cache_key(name, widths):
+    return f'thumbnails:{VERSION}:{name}:{",".join(map(str, widths))}'
+
+
+def _generate(fieldfile, widths, key):
+    try:
+        result = generate(fieldfile.name, widths, fieldfile.storage)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.info('Cannot make thumbnails of %s: %s', fieldfile.name, e)
+        cache.set(key, {}, FAILURE_TIMEOUT)
+        return {}
+    cache.set(key, result, None)
+    return result
+
+
+def variants_many(fieldfiles, widths=DEFAULT_WIDTHS):
+    """``variants`` of several image fields with one cache lookup
+
+    Returns ``{name: variants or None}`` for the non-empty fields.
+    """
+    keys = {fieldfile.name: _cache_key(fieldfile.name, widths) for fieldfile in fieldfiles if fieldfile}
+    found = cache.get_many(keys.values())
+    results = {}
+    for fieldfile in fieldfiles:
+        if fieldfile and fieldfile.name not in results:
+            key = keys[fieldfile.name]
+            result = found[key] if key in found else _generate(fieldfile, widths, key)
+            results[fieldfile.name] = result or None
+    return results
+
+
+def variants(fieldfile, widths=DEFAULT_WIDTHS):
+    """Cached variants of an image field, generating them on first use
+
+    Returns ``None`` for empty fields and for sources Pillow cannot read or
+    refuses as decompression bombs, so callers fall back to the original file.
+    """
+    return variants_many([fieldfile], widths).get(fieldfile.name) if fieldfile else None
+
+
+def warm(fieldfile, widths=DEFAULT_WIDTHS):
+    """Regenerate the variants of a freshly saved image"""
+    if fieldfile:
+        cache.delete(_cache_key(fieldfile.name, widths))
+        variants(fieldfile, widths)
+
+
+def srcset(candidates):
+    return ', '.join(f'{url} {width}w' for url, width in candidates)
+
@@ -1,14 +1,28 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpResponse, JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Avg
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
 from .models import Product, Category, Cart, CartItem, Order, OrderItem, Review, Wishlist
+from . import catalog
+from .cache import adepend_on, aget_versions, cache_anonymous_page, page_cache_timeout
+from .cart import remember_cart_summary
+from .checkout import EmptyCart, InsufficientStock, place_order
+from .pagination import KeysetPaginator
+from .payments import arecord_event, verify_callback
+from .ratings import RATINGS
 import json
 from django.conf import settings
 from liqpay.liqpay import LiqPay
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+# Templates can still reach the database through lazy context (request.user,
+# the cart summary, fragment-cached querysets), so async views render in a thread
+arender = sync_to_async(render)
 
 
 def about(request):
@@ -21,73 +35,54 @@ def contact(request):
     return render(request, 'shop/contact.html')
 
 
-def index(request):
+@cache_anonymous_page
+async def index(request):
     """Display all products with filtering and pagination"""
-    products = Product.objects.filter(is_active=True)
-    categories = Category.objects.all()
-    
-    # Filter by category
     category_id = request.GET.get('category')
-    if category_id:
-        products = products.filter(category_id=category_id)
-    
-    # Search functionality
     search_query = request.GET.get('search')
-    if search_query:
-        products = products.filter(
-            Q(title__icontains=search_query) | 
-            Q(description__icontains=search_query)
-        )
-    
-    # Sort products
-    sort_by = request.GET.get('sort', 'created_at')
-    if sort_by == 'price_low':
-        products = products.order_by('price')
-    elif sort_by == 'price_high':
-        products = products.order_by('-price')
-    elif sort_by == 'name':
-        products = products.order_by('title')
+    sort_by = request.GET.get('sort', 'relevance' if search_query else 'created_at')
+    if category_id and not search_query:
+        await adepend_on(request, 'categories', f'category:{category_id}')
     else:
-        products = products.order_by('-created_at')
+        await adepend_on(request, 'catalog', 'categories', 'featured')
+    products = catalog.product_listing(category_id, search_query, sort_by)
     
-    # Pagination
-    paginator = Paginator(products, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Featured products
-    featured_products = Product.objects.filter(featured=True, is_active=True)[:4]
+    # Cursor pagination keyed on the active sort
+    paginator = KeysetPaginator(products, 12)
+    page_obj = await paginator.aget_page(request.GET.get('cursor'))
     
     context = {
         'page_obj': page_obj,
-        'categories': categories,
-        'featured_products': featured_products,
+        # Evaluated only when the template fragment cache misses
+        'categories': SimpleLazyObject(catalog.categories),
+        'featured_products': SimpleLazyObject(catalog.featured_products),
+        'fragment_versions': await aget_versions('categories', 'featured'),
+        'fragment_timeout': page_cache_timeout(),
         'current_category': category_id,
         'search_query': search_query,
         'sort_by': sort_by,
     }
-    return render(request, 'shop/products.html', context)
+    return await arender(request, 'shop/products.html', context)
 
 
-def product_detail(request, product_id):
+@cache_anonymous_page
+async def product_detail(request, product_id):
     """Display single product details"""
-    product = get_object_or_404(Product, pk=product_id, is_active=True)
-    reviews = product.reviews.all().order_by('-created_at')
-    related_products = Product.objects.filter(
-        category=product.category, 
-        is_active=True
-    ).exclude(id=product.id)[:4]
-    
-    # Calculate average rating
-    avg_rating = reviews.aggregate(Avg('rating'))['rating__avg']
+    await adepend_on(request, f'product:{product_id}')
+    try:
+        product = await catalog.aproduct_detail(product_id)
+    except Product.DoesNotExist:
+        raise Http404('No Product matches the given query.')
+    # Related products come from the same category
+    await adepend_on(request, f'category:{product.category_id}')
     
     context = {
         'product': product,
-        'reviews': reviews,
-        'related_products': related_products,
-        'avg_rating': avg_rating,
+        'reviews': await catalog.aproduct_reviews(product),
+        'related_products': await catalog.arelated_products(product),
+        'avg_rating': product.average_rating,
     }
-    return render(request, 'shop/product_detail.html', context)
+    return await arender(request, 'shop/product_detail.html', context)
 
 
 def add_to_cart(request, product_id):
@@ -122,25 +117,31 @@ def add_to_cart(request, product_id):
             cart_item.quantity = product.stock_quantity
         cart_item.save()
 
+    # Keeps an active guest cart away from the reaper
+    cart.save(update_fields=['updated_at'])
+    remember_cart_summary(request, cart)
     messages.success(request, f'{product.title} added to your cart.')
     return redirect('shop:cart')
 
 
-def cart_view(request):
+async def cart_view(request):
     """Display cart contents"""
     cart = None
     cart_items = []
-    if request.user.is_authenticated:
+    # Line totals and the summary reuse the prefetched items and products
+    carts = Cart.objects.prefetch_related('items__product__category')
+    user = await request.auser()
+    if user.is_authenticated:
         try:
-            cart = Cart.objects.get(user=request.user)
+            cart = await carts.aget(user=user)
             cart_items = cart.items.all()
         except Cart.DoesNotExist:
             pass  # No cart for this user yet
     else:
-        session_cart = request.session.get('cart')
+        session_cart = await request.session.aget('cart')
         if session_cart:
             try:
-                cart = Cart.objects.get(id=session_cart.get('id'), user=None)
+                cart = await carts.aget(id=session_cart.get('id'), user=None)
                 cart_items = cart.items.all()
             except Cart.DoesNotExist:
                 pass  # Stale session data
@@ -149,7 +150,7 @@ def cart_view(request):
         'cart_items': cart_items,
         'cart': cart,
     }
-    return render(request, 'shop/cart.html', context)
+    return await arender(request, 'shop/cart.html', context)
 
 
 @login_required
@@ -168,6 +169,7 @@ def update_cart(request, item_id):
             cart_item.quantity = quantity
             cart_item.save()
             messages.success(request, 'Cart updated.')
+        remember_cart_summary(request, cart_item.cart)
     
     return redirect('shop:cart')
 
@@ -177,6 +179,7 @@ def remove_from_cart(request, item_id):
     """Remove item from cart"""
     cart_item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
     cart_item.delete()
+    remember_cart_summary(request, cart_item.cart)
     messages.success(request, 'Item removed from cart.')
     return redirect('shop:cart')
 
@@ -185,7 +188,7 @@ def remove_from_cart(request, item_id):
 def checkout(request):
     """Checkout process"""
     try:
-        cart = Cart.objects.get(user=request.user)
+        cart = Cart.objects.prefetch_related('items__product').get(user=request.user)
         cart_items = cart.items.all()
         if not cart_items:
             messages.error(request, 'Your cart is empty.')
@@ -195,32 +198,25 @@ def checkout(request):
         return redirect('shop:cart')
     
     if request.method == 'POST':
-        # Create order
-        order = Order.objects.create(
-            user=request.user,
-            total_amount=cart.total_price,
-            shipping_address=request.POST.get('shipping_address'),
-            billing_address=request.POST.get('billing_address'),
-            phone=request.POST.get('phone'),
-            email=request.POST.get('email'),
-            notes=request.POST.get('notes', ''),
-        )
-        
-        # Create order items
-        for cart_item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                product=cart_item.product,
-                quantity=cart_item.quantity,
-                price=cart_item.product.get_price,
+        try:
+            order = place_order(
+                cart,
+                request.user,
+                shipping_address=request.POST.get('shipping_address'),
+                billing_address=request.POST.get('billing_address'),
+                phone=request.POST.get('phone'),
+                email=request.POST.get('email'),
+                notes=request.POST.get('notes', ''),
             )
-            # Update stock
-            cart_item.product.stock_quantity -= cart_item.quantity
-            cart_item.product.save()
-        
-        # Clear cart
-        cart_items.delete()
+        except EmptyCart:
+            messages.error(request, 'Your cart is empty.')
+            return redirect('shop:cart')
+        except InsufficientStock as e:
+            for item in e.items:
+                messages.error(request, f"Only {item['available']} of {item['title']} left in stock.")
+            return redirect('shop:cart')
         
+        remember_cart_summary(request, cart)
         messages.success(request, f'Order {order.order_number} placed successfully!')
         return redirect('shop:payment', order_id=order.id)
     
@@ -240,11 +236,12 @@ def order_detail(request, order_id):
 
 
 @login_required
-def order_history(request):
+async def order_history(request):
     """Display user's order history"""
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')
+    user = await request.auser()
+    orders = [order async for order in Order.objects.filter(user=user).order_by('-created_at')]
     context = {'orders': orders}
-    return render(request, 'shop/order_history.html', context)
+    return await arender(request, 'shop/order_history.html', context)
 
 
 @login_required
@@ -252,22 +249,32 @@ def add_review(request, product_id):
     """Add product review"""
     if request.method == 'POST':
         product = get_object_or_404(Product, pk=product_id)
-        rating = int(request.POST.get('rating'))
-        comment = request.POST.get('comment')
-        
-        review, created = Review.objects.get_or_create(
-            product=product,
-            user=request.user,
-            defaults={'rating': rating, 'comment': comment}
-        )
-        
-        if not created:
-            review.rating = rating
-            review.comment = comment
-            review.save()
-            messages.success(request, 'Review updated successfully.')
-        else:
+        try:
+            rating = int(request.POST.get('rating', ''))
+        except ValueError:
+            rating = None
+        if rating not in RATINGS:
+            messages.error(request, 'Choose a rating from 1 to 5.')
+            return redirect('shop:product_detail', product_id=product_id)
+        comment = request.POST.get('comment', '')
+
+        # The Review signals move the product's rating aggregates
+        with transaction.atomic():
+            review, created = Review.objects.select_for_update().get_or_create(
+                product=product,
+                user=request.user,
+                defaults={'rating': rating, 'comment': comment}
+            )
+
+            if not created:
+                review.rating = rating
+                review.comment = comment
+                review.save()
+
+        if created:
             messages.success(request, 'Review added successfully.')
+        else:
+            messages.success(request, 'Review updated successfully.')
     
     return redirect('shop:product_detail', product_id=product_id)
 
@@ -307,30 +314,24 @@ def payment(request, order_id):
         'description': f'Payment for order #{order.order_number}',
         'order_id': str(order.id),
         'version': '3',
-        'result_url': request.build_absolute_uri(f'/shop/order/{order.id}/'),
-        'server_url': request.build_absolute_uri('/shop/liqpay-callback/'),
+        'result_url': request.build_absolute_uri(reverse('shop:order_detail', args=[order.id])),
+        'server_url': request.build_absolute_uri(reverse('shop:liqpay_callback')),
     }
     form = liqpay.cnb_form(params)
     return render(request, 'shop/payment.html', {'form': form})
 
 
 @csrf_exempt
-def liqpay_callback(request):
-    if request.method == 'POST':
-        data = request.POST.get('data')
-        signature = request.POST.get('signature')
-        
-        liqpay = LiqPay(settings.LIQPAY_PUBLIC_KEY, settings.LIQPAY_PRIVATE_KEY)
-        sign = liqpay.str_to_sign(settings.LIQPAY_PRIVATE_KEY + data + settings.LIQPAY_PRIVATE_KEY)
-        
-        if sign == signature:
-            response = liqpay.decode_data_from_str(data)
-            order_id = response.get('order_id')
-            status = response.get('status')
-            
-            if status == 'success':
-                order = Order.objects.get(id=order_id)
-                order.status = 'processing'
-                order.save()
-                
+@require_POST
+async def liqpay_callback(request):
+    """Record a LiqPay callback and acknowledge it straight away
+
+    The order is updated later by ``shop.payments.process_events``, so a
+    burst of callbacks costs one INSERT each and provider retries are no-ops.
+    """
+    data = request.POST.get('data', '')
+    payload = verify_callback(data, request.POST.get('signature', ''))
+    if payload is None:
+        return HttpResponse(status=400)
+    await arecord_event(payload, data)
     return HttpResponse(status=200)
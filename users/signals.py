@@ -1,6 +1,6 @@
 from django.contrib.auth.signals import user_logged_in
 from django.dispatch import receiver
-from shop.models import Cart, CartItem
+from shop.cart import SESSION_KEY as CART_SUMMARY_KEY, merge_guest_cart, remember_cart_summary
 
 @receiver(user_logged_in)
 def merge_session_cart_with_db_cart(sender, user, request, **kwargs):
@@ -9,24 +9,10 @@ def merge_session_cart_with_db_cart(sender, user, request, **kwargs):
     """
     session_cart_data = request.session.get('cart')
     if session_cart_data:
-        try:
-            session_cart = Cart.objects.get(id=session_cart_data.get('id'), user=None)
-            user_cart, created = Cart.objects.get_or_create(user=user)
-
-            for session_item in session_cart.items.all():
-                # Check if the item already exists in the user's cart
-                cart_item, created = CartItem.objects.get_or_create(
-                    cart=user_cart,
-                    product=session_item.product,
-                    defaults={'quantity': session_item.quantity}
-                )
-                if not created:
-                    # If it exists, update the quantity
-                    cart_item.quantity += session_item.quantity
-                    cart_item.save()
-            
-            # Clear the session cart
-            session_cart.delete()
-            request.session['cart'] = None
-        except Cart.DoesNotExist:
-            pass # No session cart to merge
+        user_cart = merge_guest_cart(session_cart_data.get('id'), user)
+        request.session['cart'] = None
+        if user_cart is not None:
+            remember_cart_summary(request, user_cart)
+            return
+    # Recomputed from the user's own cart on the next page
+    request.session.pop(CART_SUMMARY_KEY, None)
@@ -1,3 +1,65 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from shop.cart import merge_guest_cart
+from shop.models import Cart, CartItem, Category, Product
+
+
+class SessionCartMergeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(title='Books')
+        cls.products = [
+            Product.objects.create(
+                title=f'Book {i}', description='', price=10, stock_quantity=5,
+                image='products/test.png', category=category,
+            )
+            for i in range(20)
+        ]
+        cls.user = User.objects.create_user('shopper', password='secret')
+
+    def fill_guest_cart(self, quantities):
+        cart = Cart.objects.create()
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, product=product, quantity=quantity)
+            for product, quantity in zip(self.products, quantities)
+        )
+        session = self.client.session
+        session['cart'] = {'id': cart.id}
+        session.save()
+        return cart
+
+    def user_quantities(self):
+        return dict(CartItem.objects.filter(cart__user=self.user).values_list('product_id', 'quantity'))
+
+    def test_merge_adds_quantities_clamped_to_stock(self):
+        user_cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=user_cart, product=self.products[0], quantity=4)
+        CartItem.objects.create(cart=user_cart, product=self.products[2], quantity=1)
+        guest_cart = self.fill_guest_cart([3, 2])
+
+        self.client.login(username='shopper', password='secret')
+
+        self.assertEqual(self.user_quantities(), {
+            self.products[0].id: 5,
+            self.products[1].id: 2,
+            self.products[2].id: 1,
+        })
+        self.assertFalse(Cart.objects.filter(pk=guest_cart.pk).exists())
+        self.assertIsNone(self.client.session['cart'])
+        self.assertEqual(self.client.session['cart_summary']['count'], 8)
+
+    def test_merge_query_count_does_not_grow_with_cart_size(self):
+        for size in (2, 20):
+            with self.subTest(size=size):
+                user = User.objects.create(username=f'user{size}')
+                Cart.objects.create(user=user)
+                guest_cart = self.fill_guest_cart([1] * size)
+                # The guest cart delete selects its rows for the cart-summary signals
+                with self.assertNumQueries(9):
+                    merge_guest_cart(guest_cart.id, user)
+                self.assertEqual(CartItem.objects.filter(cart__user=user).count(), size)
+
+    def test_login_without_guest_cart(self):
+        self.client.login(username='shopper', password='secret')
+        self.assertFalse(Cart.objects.exists())